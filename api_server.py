@@ -14,12 +14,28 @@ Example::
     http://localhost:8000/docs
 """
 
+import gzip
+import hashlib
 import json
 import os
-from http.server import BaseHTTPRequestHandler, HTTPServer
-from urllib.parse import urlparse, parse_qs
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from operator import itemgetter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote_plus
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; se usa json de la stdlib
+    orjson = None
 
 
 def _load_env_file(path: str = ".env") -> None:
@@ -55,6 +71,8 @@ _load_env_file()
 
 BASE_URL = os.getenv("BASE_URL", "http://localhost:5212/")
 DEFAULT_HOURS = _get_int_env("DEFAULT_HOURS", 48)
+# Segundos que un cliente puede reutilizar una respuesta sin revalidarla
+CACHE_MAX_AGE = _get_int_env("CACHE_MAX_AGE", 5)
 ORDER_DESC_VALUES = {"desc", "newest", "reciente"}
 TEXT_MARGIN_SECONDS = 0.5
 _DATETIME_FORMATS = (
@@ -62,16 +80,142 @@ _DATETIME_FORMATS = (
     "%Y-%m-%d %H:%M:%S",
     "%Y-%m-%d %H:%M",
 )
+# Forma estricta que ``datetime.fromisoformat`` resuelve sin pasar por strptime
+_ISO_DATETIME_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?")
+# Segundo y tercer campo de "<id>_YYYY-MM-DD_HH-MM-SS" (fecha y hora)
+_NOMBRE_RE = re.compile(r"[^_]*_([^_]*)(?:_([^_]*))?")
+# Referencia para pasar fechas a enteros (ns) al cargar los registros
+_EPOCA = datetime(1970, 1, 1)
+_UN_MICROSEGUNDO = timedelta(microseconds=1)
+# Clave de orden de los registros sin fecha (equivale a datetime.min)
+_ORDEN_SIN_FECHA_NS = (datetime.min - _EPOCA) // _UN_MICROSEGUNDO * 1000
+
+
+class _Archivo:
+    """Entrada del registro junto a los datos derivados de su ruta.
+
+    Se arma una vez por carga del cache para que los filtros por petición solo
+    lean atributos, sin volver a separar la ruta ni parsear fechas.
+    """
 
+    __slots__ = ("ruta", "url", "fecha", "medio", "dt", "inicio", "fin", "linea", "entrada")
+
+    def __init__(self, ruta: str, entrada: dict) -> None:
+        directorio, nombre = os.path.split(ruta)
+        fecha, hora = _campos_nombre(nombre)
+        self.ruta = ruta
+        self.medio = os.path.basename(directorio)
+        self.url = _join_remote_url(self.medio, nombre)
+        self.fecha = fecha
+        self.dt = _datetime_desde_campos(fecha, hora)
+        # Inicio/fin aproximados del archivo para los filtros por instante/rango
+        self.inicio, self.fin = _estimar_bounds(self.dt, entrada)
+        # Registros con texto en columnas, para los filtros de ?text/?json
+        self.linea = _Linea(entrada)
+        self.entrada = entrada
+
+
+class _Indice:
+    """Archivos con fecha en el nombre, ordenados por ``dt``, en columnas.
+
+    ``dts`` repite el ``dt`` de cada archivo y ``inicios_min[i]`` es el menor
+    inicio estimado desde la posición ``i`` en adelante (no decrece), lo que
+    permite descartar con bisect la cola de archivos que empiezan después del
+    instante o del fin del rango pedido.
+    """
 
-def _parse_datetime_string(value: Optional[str]) -> Optional[datetime]:
-    if not value:
-        return None
-    cleaned = value.strip()
-    if not cleaned:
-        return None
+    __slots__ = ("archivos", "dts", "inicios_min", "desc", "posiciones_desc")
+
+    def __init__(self, archivos: List[_Archivo]) -> None:
+        # sort es estable: los empates conservan el orden del registro
+        self.archivos = sorted(
+            (a for a in archivos if a.dt is not None), key=lambda a: a.dt
+        )
+        self.dts = [a.dt for a in self.archivos]
+        inicios_min: List[datetime] = [None] * len(self.archivos)  # type: ignore[list-item]
+        minimo: Optional[datetime] = None
+        for i in range(len(self.archivos) - 1, -1, -1):
+            inicio = self.archivos[i].inicio or self.archivos[i].dt
+            if minimo is None or inicio < minimo:
+                minimo = inicio
+            inicios_min[i] = minimo
+        self.inicios_min = inicios_min
+        # Orden descendente precalculado (sort estable: los empates conservan
+        # el orden del registro) y la posición ascendente de cada elemento
+        dts = self.dts
+        self.posiciones_desc = sorted(
+            range(len(dts)), key=dts.__getitem__, reverse=True
+        )
+        self.desc = [self.archivos[i] for i in self.posiciones_desc]
+
+    def entre(
+        self, desde: datetime, maximo: Optional[datetime], desc: bool = False
+    ) -> List[_Archivo]:
+        """Archivos con ``dt >= desde`` que podrían empezar antes de ``maximo``.
+
+        Con ``desc`` se devuelven del más reciente al más antiguo.
+        """
+
+        total = len(self.archivos)
+        lo = bisect_left(self.dts, desde)
+        hi = total if maximo is None else bisect_right(self.inicios_min, maximo)
+        if not desc:
+            return self.archivos[lo:hi]
+        # Los archivos con dt >= desde son un prefijo del orden descendente
+        if hi == total:
+            return self.desc[: total - lo]
+        return [
+            archivo
+            for archivo, posicion in zip(self.desc[: total - lo], self.posiciones_desc)
+            if posicion < hi
+        ]
+
+
+# Cache del registro combinado. La firma ("sig") es una tupla de
+# (nombre, st_mtime_ns, st_size) por cada transcripciones_*.json; el resto son
+# datos derivados del registro. Se reemplaza completo en cada recarga para que
+# los lectores nunca vean una mezcla de versiones.
+_CACHE: Dict[str, Any] = {"sig": None, "registro": None}
+_CACHE_LOCK = threading.Lock()
+# Último error de carga y la firma que lo produjo; evita que cada hilo en espera
+# vuelva a parsear un archivo corrupto o a medio escribir.
+_CACHE_ERROR: Tuple[Any, Optional[str]] = (None, None)
+# Resultado publicado por el hilo de refresco (None si no está activo)
+_REFRESH_INTERVAL_SECONDS = 1.0
+_ESTADO_REFRESCO: Optional[Tuple[Optional[Dict[str, Any]], Optional[str]]] = None
+# Tamaño aproximado de cada escritura al socket al enviar listados
+_WRITE_BATCH_BYTES = 1 << 16
+# Respuestas comprimidas con gzip, indexadas por ETag (identifica el contenido)
+_GZIP_MIN_BYTES = 1024
+_GZIP_CACHE_SIZE = 64
+_GZIP_CACHE: "OrderedDict[str, bytes]" = OrderedDict()
+_GZIP_LOCK = threading.Lock()
+# Hilos para leer en paralelo los archivos que cambiaron
+_CARGA_MAX_HILOS = 8
+# Selecciones ?text/?json en construcción; peticiones idénticas simultáneas
+# esperan el mismo resultado en vez de recalcularlo
+_EN_CURSO: Dict[Tuple[Any, ...], "Future[Any]"] = {}
+_EN_CURSO_LOCK = threading.Lock()
+# Cuerpos ?text/?json ya serializados (con su ETag), por versión del cache,
+# archivos elegidos y filtros
+_RESPUESTAS_CACHE_SIZE = 64
+_RESPUESTAS_CACHE: "OrderedDict[Tuple[Any, ...], Optional[Tuple[bytes, str]]]" = OrderedDict()
+_RESPUESTAS_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1 << 17)
+def _parse_datetime_cached(cleaned: str) -> Optional[datetime]:
+    # Los mismos fecha+hora se repiten entre bloques y peticiones; el tamaño
+    # acotado evita que entradas únicas hagan crecer el cache sin límite.
     # Permite tanto separador espacio como 'T'
     normalized = cleaned.replace("T", " ")
+    if _ISO_DATETIME_RE.fullmatch(normalized):
+        # Camino rápido en C; strptime queda para variantes menos estrictas
+        # (p.ej. campos de un dígito) que también se aceptan.
+        try:
+            return datetime.fromisoformat(normalized)
+        except ValueError:
+            pass
     for fmt in _DATETIME_FORMATS:
         try:
             return datetime.strptime(normalized, fmt)
@@ -80,43 +224,19 @@ def _parse_datetime_string(value: Optional[str]) -> Optional[datetime]:
     return None
 
 
-def _parse_datetime(fecha: Optional[str], hora: Optional[str]) -> Optional[datetime]:
-    if not fecha or not hora:
+def _parse_datetime_string(value: Optional[str]) -> Optional[datetime]:
+    if not value:
         return None
-    return _parse_datetime_string(f"{fecha.strip()} {hora.strip()}")
-
-
-def _ensure_block_duration(bloque: dict) -> None:
-    if "duracion" in bloque and bloque["duracion"] is not None:
-        return
-    inicio = _parse_datetime(bloque.get("fecha"), bloque.get("inicio"))
-    fin = _parse_datetime(bloque.get("fecha"), bloque.get("fin"))
-    if inicio and fin:
-        bloque["duracion"] = round((fin - inicio).total_seconds(), 3)
-    else:
-        bloque.setdefault("duracion", None)
+    cleaned = value.strip()
+    if not cleaned:
+        return None
+    return _parse_datetime_cached(cleaned)
 
 
-def _calculate_file_duration(registros: List[dict]) -> Optional[float]:
-    if not registros:
-        return None
-    inicios = []
-    fines = []
-    for bloque in registros:
-        if not isinstance(bloque, dict):
-            continue
-        inicio = _parse_datetime(bloque.get("fecha"), bloque.get("inicio"))
-        fin = _parse_datetime(bloque.get("fecha"), bloque.get("fin"))
-        if inicio:
-            inicios.append(inicio)
-        if fin:
-            fines.append(fin)
-    if not inicios or not fines:
-        return None
-    duracion_total = (max(fines) - min(inicios)).total_seconds()
-    if duracion_total < 0:
+def _parse_datetime(fecha: Optional[str], hora: Optional[str]) -> Optional[datetime]:
+    if not fecha or not hora:
         return None
-    return round(duracion_total, 3)
+    return _parse_datetime_string(f"{fecha.strip()} {hora.strip()}")
 
 
 def _normalizar_entrada(entrada: Any) -> dict:
@@ -132,18 +252,316 @@ def _normalizar_entrada(entrada: Any) -> dict:
         registros = []
         entrada = {"registros": registros}
 
+    # Una sola pasada: cada inicio/fin se parsea una vez y sirve tanto para la
+    # duración del bloque como para la del archivo completo.
+    inicio_min: Optional[datetime] = None
+    fin_max: Optional[datetime] = None
     for bloque in registros:
-        if isinstance(bloque, dict):
-            _ensure_block_duration(bloque)
+        if not isinstance(bloque, dict):
+            continue
+        inicio = _parse_datetime(bloque.get("fecha"), bloque.get("inicio"))
+        fin = _parse_datetime(bloque.get("fecha"), bloque.get("fin"))
+        if bloque.get("duracion") is None:
+            if inicio and fin:
+                bloque["duracion"] = round((fin - inicio).total_seconds(), 3)
+            else:
+                bloque.setdefault("duracion", None)
+        if inicio and (inicio_min is None or inicio < inicio_min):
+            inicio_min = inicio
+        if fin and (fin_max is None or fin > fin_max):
+            fin_max = fin
 
     if entrada.get("duracion") is None:
-        entrada["duracion"] = _calculate_file_duration([
-            b for b in registros if isinstance(b, dict)
-        ])
+        duracion_total = None
+        if inicio_min and fin_max:
+            duracion_total = (fin_max - inicio_min).total_seconds()
+        entrada["duracion"] = (
+            round(duracion_total, 3) if duracion_total is not None and duracion_total >= 0 else None
+        )
 
     return entrada
 
 
+def _decode_json(data: bytes) -> Any:
+    """Decodifica JSON con orjson si está disponible.
+
+    ``orjson.JSONDecodeError`` hereda de ``json.JSONDecodeError``, por lo que
+    los llamadores pueden capturar siempre esta última.
+    """
+
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _hash_etag(data: bytes) -> str:
+    return '"' + hashlib.blake2b(data, digest_size=8).hexdigest() + '"'
+
+
+def _etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Indica si el encabezado ``If-None-Match`` incluye el ETag dado."""
+
+    if not if_none_match:
+        return False
+    for candidato in if_none_match.split(","):
+        candidato = candidato.strip()
+        if candidato == "*":
+            return True
+        if candidato.startswith("W/"):
+            candidato = candidato[2:]
+        if candidato == etag:
+            return True
+    return False
+
+
+def _acepta_gzip(accept_encoding: Optional[str]) -> bool:
+    """Indica si el cliente acepta ``gzip`` según ``Accept-Encoding``."""
+
+    if not accept_encoding:
+        return False
+    for parte in accept_encoding.split(","):
+        codificacion, _, params = parte.partition(";")
+        if codificacion.strip().lower() not in ("gzip", "*"):
+            continue
+        params = params.strip().replace(" ", "")
+        return params not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def _gzip_etag(etag: str) -> str:
+    return etag[:-1] + '-gz"'
+
+
+def _comprimir(chunks: List[bytes], etag: Optional[str]) -> bytes:
+    """Comprime el cuerpo con gzip, reutilizando el resultado por ETag."""
+
+    if etag is None:
+        return gzip.compress(b"".join(chunks), compresslevel=6)
+    with _GZIP_LOCK:
+        body = _GZIP_CACHE.get(etag)
+        if body is not None:
+            _GZIP_CACHE.move_to_end(etag)
+            return body
+    body = gzip.compress(b"".join(chunks), compresslevel=6)
+    with _GZIP_LOCK:
+        _GZIP_CACHE[etag] = body
+        while len(_GZIP_CACHE) > _GZIP_CACHE_SIZE:
+            _GZIP_CACHE.popitem(last=False)
+    return body
+
+
+def _firma_archivos(directorio: str = ".") -> Tuple[Tuple[str, int, int], ...]:
+    """Devuelve la firma (nombre, mtime_ns, tamaño) de los transcripciones_*.json.
+
+    Un solo recorrido con ``os.scandir`` entrega el nombre y el ``stat`` de
+    cada archivo, sin listar primero y consultar cada ruta después.
+    """
+
+    firma = []
+    with os.scandir(directorio) as entradas:
+        for entrada in entradas:
+            nombre = entrada.name
+            if not (nombre.startswith("transcripciones") and nombre.endswith(".json")):
+                continue
+            try:
+                if not entrada.is_file():
+                    continue
+                st = entrada.stat()
+            except OSError:
+                continue
+            firma.append((nombre, st.st_mtime_ns, st.st_size))
+    return tuple(firma)
+
+
+def _cargar_archivo(archivo: str) -> Dict[str, dict]:
+    """Lee un transcripciones_*.json y devuelve sus entradas normalizadas."""
+
+    with open(archivo, "rb") as fh:
+        datos = _decode_json(fh.read())
+    if not isinstance(datos, dict):
+        return {}
+    return {ruta: _normalizar_entrada(entrada) for ruta, entrada in datos.items()}
+
+
+def _guardar_cargas(
+    por_archivo: Dict[str, Tuple[int, int, Dict[str, dict]]],
+    pendientes: List[Tuple[str, int, int]],
+    cargas: Iterable[Dict[str, dict]],
+) -> Optional[str]:
+    """Guarda en ``por_archivo`` las entradas leídas; devuelve el primer error."""
+
+    resultados = iter(cargas)
+    for archivo, mtime_ns, size in pendientes:
+        try:
+            entradas = next(resultados)
+        except json.JSONDecodeError as exc:
+            return f"Error leyendo {archivo}: {exc}"
+        por_archivo[archivo] = (mtime_ns, size, entradas)
+    return None
+
+
+def _construir_cache(
+    firma: Tuple[Tuple[str, int, int], ...], anterior: Dict[str, Any]
+) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Arma una nueva entrada de cache a partir de la firma.
+
+    Solo se vuelven a leer los archivos cuya fecha de modificación o tamaño
+    cambió respecto de ``anterior``; el resto reutiliza sus entradas ya
+    normalizadas, junto con los registros y bytes derivados de ellas.
+    """
+
+    por_archivo_previo: Dict[str, Tuple[int, int, Dict[str, dict]]] = anterior.get(
+        "por_archivo", {}
+    )
+    por_archivo: Dict[str, Tuple[int, int, Dict[str, dict]]] = {}
+    pendientes: List[Tuple[str, int, int]] = []
+    for archivo, mtime_ns, size in firma:
+        previo = por_archivo_previo.get(archivo)
+        if previo is not None and previo[0] == mtime_ns and previo[1] == size:
+            por_archivo[archivo] = previo
+            continue
+        # Se reserva la posición para mantener el orden de la firma
+        por_archivo[archivo] = None  # type: ignore[assignment]
+        pendientes.append((archivo, mtime_ns, size))
+    rutas = [archivo for archivo, _, _ in pendientes]
+    if len(rutas) > 1:
+        # Varios archivos cambiados (p.ej. la primera carga): se leen en
+        # paralelo para solapar las esperas de disco
+        with ThreadPoolExecutor(max_workers=min(_CARGA_MAX_HILOS, len(rutas))) as executor:
+            error = _guardar_cargas(por_archivo, pendientes, executor.map(_cargar_archivo, rutas))
+    else:
+        error = _guardar_cargas(por_archivo, pendientes, map(_cargar_archivo, rutas))
+    if error:
+        return None, error
+    # Combina todos los archivos en una sola pasada
+    registro: Dict[str, dict] = {
+        ruta: entrada
+        for _, _, entradas in por_archivo.values()
+        for ruta, entrada in entradas.items()
+    }
+
+    # Metadatos por ruta e índices por fecha y medio, para no volver a
+    # procesar los nombres de archivo en cada petición. Las entradas que no
+    # cambiaron conservan su registro y sus bytes serializados.
+    meta_previa: Dict[str, _Archivo] = anterior.get("meta", {})
+    bytes_previos: Dict[str, bytes] = anterior.get("entry_bytes", {})
+    pretty_previos: Dict[str, bytes] = anterior.get("entry_bytes_pretty", {})
+    archivos: List[_Archivo] = []
+    posicion: Dict[str, int] = {}
+    meta: Dict[str, _Archivo] = {}
+    entry_bytes: Dict[str, bytes] = {}
+    entry_bytes_pretty: Dict[str, bytes] = {}
+    by_fecha: Dict[Optional[str], List[_Archivo]] = {}
+    by_medio: Dict[str, List[_Archivo]] = {}
+    by_fecha_medio: Dict[Tuple[Optional[str], str], List[_Archivo]] = {}
+    for ruta, entrada in registro.items():
+        archivo = meta_previa.get(ruta)
+        if archivo is not None and archivo.entrada is entrada:
+            entry_bytes[ruta] = bytes_previos[ruta]
+            if ruta in pretty_previos:
+                entry_bytes_pretty[ruta] = pretty_previos[ruta]
+        else:
+            archivo = _Archivo(ruta, entrada)
+            entry_bytes[ruta] = _encode_entrada(ruta, archivo.url, entrada)
+        posicion[ruta] = len(archivos)
+        archivos.append(archivo)
+        meta[ruta] = archivo
+        by_fecha.setdefault(archivo.fecha, []).append(archivo)
+        by_medio.setdefault(archivo.medio, []).append(archivo)
+        by_fecha_medio.setdefault((archivo.fecha, archivo.medio), []).append(archivo)
+
+    cache = {
+        "sig": firma,
+        # Identifica la versión del registro; base de los ETag de los listados
+        "etag": _hash_etag(repr(firma).encode("utf-8")),
+        "por_archivo": por_archivo,
+        "registro": registro,
+        "archivos": archivos,
+        # Posición de cada ruta en el registro, para recuperar ese orden
+        "posicion": posicion,
+        "meta": meta,
+        # Índices ordenados por fecha/hora: todo, por fecha y por medio
+        "indice": _Indice(archivos),
+        "by_fecha": {fecha: _Indice(lista) for fecha, lista in by_fecha.items()},
+        "by_medio": {medio: _Indice(lista) for medio, lista in by_medio.items()},
+        "by_fecha_medio": {
+            clave: _Indice(lista) for clave, lista in by_fecha_medio.items()
+        },
+        # Cada elemento del listado ya serializado, listo para concatenar
+        "entry_bytes": entry_bytes,
+        # Variante indentada (?pretty), se completa a medida que se pide
+        "entry_bytes_pretty": entry_bytes_pretty,
+    }
+    return cache, None
+
+
+def cargar_cache() -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Devuelve la entrada de cache vigente como ``(cache, error)``.
+
+    Solo se vuelve a leer desde disco cuando cambia la fecha de modificación o
+    el tamaño de algún archivo de transcripciones. La entrada devuelta es
+    compartida entre peticiones: los llamadores no deben modificarla.
+    """
+
+    global _CACHE, _CACHE_ERROR  # noqa: PLW0603
+    firma = _firma_archivos()
+    if not firma:
+        return None, "No se encontraron archivos de transcripciones"
+    cache = _CACHE
+    if cache["sig"] == firma:
+        return cache, None
+    with _CACHE_LOCK:
+        # Otro hilo pudo haber recargado (o fallado) mientras esperábamos
+        cache = _CACHE
+        if cache["sig"] == firma:
+            return cache, None
+        if _CACHE_ERROR[0] == firma:
+            return None, _CACHE_ERROR[1]
+        cache, error = _construir_cache(firma, cache)
+        if error:
+            _CACHE_ERROR = (firma, error)
+            return None, error
+        _CACHE = cache
+    return cache, None
+
+
+def _refrescar_cache(intervalo: float) -> None:
+    """Revisa los archivos periódicamente y publica el cache actualizado."""
+
+    global _ESTADO_REFRESCO  # noqa: PLW0603
+    while True:
+        time.sleep(intervalo)
+        try:
+            _ESTADO_REFRESCO = cargar_cache()
+        except Exception as exc:  # noqa: BLE001
+            # Mantener el último estado publicado y reintentar en la próxima vuelta
+            print(f"Error refrescando transcripciones: {exc}")
+
+
+def iniciar_refresco(intervalo: float = _REFRESH_INTERVAL_SECONDS) -> None:
+    """Carga el cache y lanza el hilo que lo mantiene al día en segundo plano.
+
+    Con el refresco activo las peticiones solo leen el último estado
+    publicado y nunca esperan a que se parseen los archivos.
+    """
+
+    global _ESTADO_REFRESCO  # noqa: PLW0603
+    _ESTADO_REFRESCO = cargar_cache()
+    hilo = threading.Thread(
+        target=_refrescar_cache, args=(intervalo,), name="refresco-registro", daemon=True
+    )
+    hilo.start()
+
+
+def obtener_cache() -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Devuelve el cache publicado por el refresco o lo carga bajo demanda."""
+
+    estado = _ESTADO_REFRESCO
+    if estado is not None:
+        return estado
+    return cargar_cache()
+
+
 def cargar_registros():
     """Carga y combina los archivos de transcripciones.
 
@@ -151,37 +569,49 @@ def cargar_registros():
     con las transcripciones combinadas o ``None`` si no se pudieron cargar.
     ``error`` guarda un mensaje descriptivo cuando ocurre un problema, en caso
     contrario es ``None``.
+
+    El resultado proviene de :func:`cargar_cache`, por lo que es compartido:
+    los llamadores no deben modificarlo.
     """
 
-    archivos = [
-        f
-        for f in os.listdir()
-        if f.startswith("transcripciones") and f.endswith(".json")
-    ]
-    if not archivos:
-        return None, "No se encontraron archivos de transcripciones"
-    registro: Dict[str, dict] = {}
-    for archivo in archivos:
+    cache, error = cargar_cache()
+    if error:
+        return None, error
+    return cache["registro"], None
+
+
+def _campos_nombre(nombre_archivo: str) -> Tuple[Optional[str], Optional[str]]:
+    """Devuelve ``(fecha, hora)`` desde ``<id>_YYYY-MM-DD_HH-MM-SS.<ext>``.
+
+    Un solo ``match`` de una expresión precompilada reemplaza el ``split`` y
+    evita crear la lista intermedia de partes.
+    """
+
+    base, _ = os.path.splitext(os.path.basename(nombre_archivo))
+    m = _NOMBRE_RE.match(base)
+    if m is None:
+        return None, None
+    return m.group(1), m.group(2)
+
+
+def _datetime_desde_campos(fecha: Optional[str], hora: Optional[str]) -> Optional[datetime]:
+    if fecha is None or hora is None:
+        return None
+    if len(fecha) == 10 and len(hora) == 8 and hora[2] == "-" and hora[5] == "-":
         try:
-            with open(archivo, "r", encoding="utf-8") as fh:
-                datos = json.load(fh)
-        except json.JSONDecodeError as exc:
-            return None, f"Error leyendo {archivo}: {exc}"
-        if not isinstance(datos, dict):
-            continue
-        for ruta, entrada in datos.items():
-            registro[ruta] = _normalizar_entrada(entrada)
-    return registro, None
+            return datetime.fromisoformat(f"{fecha} {hora[:2]}:{hora[3:5]}:{hora[6:]}")
+        except ValueError:
+            pass
+    try:
+        return datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H-%M-%S")
+    except ValueError:
+        return None
 
 
 def extraer_fecha(nombre_archivo: str) -> Optional[str]:
     """Devuelve la fecha (YYYY-MM-DD) extraída desde el nombre del archivo."""
 
-    base, _ = os.path.splitext(os.path.basename(nombre_archivo))
-    partes = base.split("_")
-    if len(partes) >= 2:
-        return partes[1]
-    return None
+    return _campos_nombre(nombre_archivo)[0]
 
 
 def extraer_medio(ruta_archivo: str) -> str:
@@ -191,16 +621,7 @@ def extraer_medio(ruta_archivo: str) -> str:
 
 
 def extraer_datetime(nombre_archivo: str) -> Optional[datetime]:
-    base, _ = os.path.splitext(os.path.basename(nombre_archivo))
-    partes = base.split("_")
-    if len(partes) >= 3:
-        fecha_str = partes[1]
-        hora_str = partes[2]
-        try:
-            return datetime.strptime(f"{fecha_str} {hora_str}", "%Y-%m-%d %H-%M-%S")
-        except ValueError:
-            return None
-    return None
+    return _datetime_desde_campos(*_campos_nombre(nombre_archivo))
 
 
 def _get_block_bounds(
@@ -208,7 +629,14 @@ def _get_block_bounds(
 ) -> Tuple[Optional[datetime], Optional[datetime]]:
     """Devuelve datetime inicio/fin aproximados para un archivo de transcripción."""
 
-    inicio_archivo = extraer_datetime(ruta_archivo)
+    return _estimar_bounds(extraer_datetime(ruta_archivo), entrada)
+
+
+def _estimar_bounds(
+    inicio_archivo: Optional[datetime], entrada: Dict[str, Any]
+) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Como :func:`_get_block_bounds`, a partir del inicio ya extraído del nombre."""
+
     duracion = entrada.get("duracion")
     if isinstance(duracion, (int, float)):
         duracion_seg = float(duracion)
@@ -252,7 +680,12 @@ def _get_block_bounds(
 def _block_contains_datetime(ruta_archivo: str, entrada: Dict[str, Any], objetivo: datetime) -> bool:
     """Indica si el bloque de transcripción cubre la fecha-hora indicada."""
 
-    inicio, fin = _get_block_bounds(ruta_archivo, entrada)
+    return _bounds_contain(*_get_block_bounds(ruta_archivo, entrada), objetivo)
+
+
+def _bounds_contain(
+    inicio: Optional[datetime], fin: Optional[datetime], objetivo: datetime
+) -> bool:
     if not inicio:
         return False
     if fin:
@@ -271,6 +704,17 @@ def _block_overlaps_range(
     if inicio_rango is None and fin_rango is None:
         return True
     inicio, fin = _get_block_bounds(ruta_archivo, entrada)
+    return _bounds_overlap_range(inicio, fin, inicio_rango, fin_rango)
+
+
+def _bounds_overlap_range(
+    inicio: Optional[datetime],
+    fin: Optional[datetime],
+    inicio_rango: Optional[datetime],
+    fin_rango: Optional[datetime],
+) -> bool:
+    if inicio_rango is None and fin_rango is None:
+        return True
     if inicio is None:
         return False
     # Si no tenemos fin del bloque, asumimos que se extiende hacia adelante.
@@ -295,175 +739,543 @@ def _get_record_bounds(bloque: Dict[str, Any]) -> Tuple[Optional[datetime], Opti
     return inicio, fin
 
 
-def _record_overlaps_range(
-    bloque: Dict[str, Any],
-    inicio_rango: Optional[datetime],
-    fin_rango: Optional[datetime],
+def _a_ns(valor: datetime) -> int:
+    """Nanosegundos desde 1970-01-01 (sin zona horaria, como las fechas del registro)."""
+
+    return (valor - _EPOCA) // _UN_MICROSEGUNDO * 1000
+
+
+def _ventana_ns(
+    objetivo_dt: Optional[datetime],
+    rango_inicio: Optional[datetime],
+    rango_fin: Optional[datetime],
     margen_segundos: float = TEXT_MARGIN_SECONDS,
+) -> Optional[Tuple[Optional[int], Optional[int]]]:
+    """Convierte el instante o rango pedido (con margen) a nanosegundos.
+
+    Devuelve None si no hay filtro: se aceptan todos los registros.
+    """
+
+    if objetivo_dt:
+        rango_inicio = rango_fin = objetivo_dt
+    elif not (rango_inicio or rango_fin):
+        return None
+    margen = timedelta(seconds=margen_segundos)
+    return (
+        _a_ns(rango_inicio - margen) if rango_inicio else None,
+        _a_ns(rango_fin + margen) if rango_fin else None,
+    )
+
+
+def _record_overlaps_range(
+    inicio_ns: Optional[int],
+    fin_ns: Optional[int],
+    inicio_rango_ns: Optional[int],
+    fin_rango_ns: Optional[int],
 ) -> bool:
-    """Determina si el registro se cruza con el rango solicitado."""
+    """Determina si el registro se cruza con el rango solicitado (en ns)."""
 
-    inicio, fin = _get_record_bounds(bloque)
-    if inicio is None and fin is None:
+    if inicio_ns is None:
+        return False
+    if inicio_rango_ns is not None and fin_ns < inicio_rango_ns:  # type: ignore[operator]
+        return False
+    if fin_rango_ns is not None and inicio_ns > fin_rango_ns:
         return False
-    if inicio is None:
-        inicio = fin
-    if fin is None:
-        fin = inicio
-    margen = timedelta(seconds=margen_segundos)
-    inicio_rango = inicio_rango - margen if inicio_rango else None
-    fin_rango = fin_rango + margen if fin_rango else None
-    if inicio_rango and fin_rango:
-        return not (fin < inicio_rango or inicio > fin_rango)
-    if inicio_rango:
-        return fin >= inicio_rango
-    if fin_rango:
-        return inicio <= fin_rango
     return True
 
 
-def _collect_text(
-    items: List[Tuple[str, dict]],
-    objetivo_dt: Optional[datetime],
-    rango_inicio: Optional[datetime],
-    rango_fin: Optional[datetime],
-) -> Tuple[str, int]:
-    """Concatena los textos de los registros filtrados por rango."""
+class _Linea:
+    """Registros con texto de un archivo, en columnas paralelas.
+
+    Se arma al cargar el cache: los filtros de ``?text``/``?json`` comparan
+    enteros y leen listas, sin volver a consultar ni limpiar cada ``dict``.
+    Si a un registro le falta uno de los extremos se usa el otro; ``ordenes``
+    es la clave con la que se ordenan los textos seleccionados.
+    """
 
-    seleccionados: List[Tuple[datetime, int, str]] = []
-    orden_seq = 0
-    for _, entrada in items:
-        registros = entrada.get("registros", []) or []
-        for bloque in registros:
+    __slots__ = ("inicios", "fines", "ordenes", "textos", "horas", "fechas")
+
+    def __init__(self, entrada: Dict[str, Any]) -> None:
+        self.inicios: List[Optional[int]] = []
+        self.fines: List[Optional[int]] = []
+        self.ordenes: List[int] = []
+        self.textos: List[str] = []
+        self.horas: List[str] = []
+        self.fechas: List[str] = []
+        for bloque in entrada.get("registros", []) or []:
             if not isinstance(bloque, dict):
                 continue
-            if objetivo_dt:
-                if not _record_overlaps_range(bloque, objetivo_dt, objetivo_dt):
-                    continue
-            elif rango_inicio or rango_fin:
-                if not _record_overlaps_range(bloque, rango_inicio, rango_fin):
-                    continue
             texto = bloque.get("texto")
             if texto is None:
                 continue
-            if not isinstance(texto, str):
-                texto = str(texto)
-            texto = texto.strip()
+            texto = _texto_limpio(texto)
             if not texto:
                 continue
             inicio, fin = _get_record_bounds(bloque)
-            orden_dt = inicio or fin or datetime.min
-            seleccionados.append((orden_dt, orden_seq, texto))
-            orden_seq += 1
-    seleccionados.sort(key=lambda item: (item[0], item[1]))
-    return " ".join(texto for _, _, texto in seleccionados).strip(), len(seleccionados)
+            inicio_ns = _a_ns(inicio) if inicio else None
+            fin_ns = _a_ns(fin) if fin else None
+            if inicio_ns is None:
+                inicio_ns = fin_ns
+            elif fin_ns is None:
+                fin_ns = inicio_ns
+            self.inicios.append(inicio_ns)
+            self.fines.append(fin_ns)
+            self.ordenes.append(_ORDEN_SIN_FECHA_NS if inicio_ns is None else inicio_ns)
+            self.textos.append(texto)
+            self.horas.append(_texto_limpio(bloque.get("inicio")))
+            # La fecha se repite en casi todos los registros: una sola copia
+            self.fechas.append(sys.intern(_texto_limpio(bloque.get("fecha"))))
+
+    def indices(self, ventana: Optional[Tuple[Optional[int], Optional[int]]]) -> Iterable[int]:
+        """Posiciones de los registros que se cruzan con ``ventana`` (todos si es None)."""
+
+        if ventana is None:
+            return range(len(self.textos))
+        inicio_rango, fin_rango = ventana
+        return [
+            i
+            for i, (inicio, fin) in enumerate(zip(self.inicios, self.fines))
+            if _record_overlaps_range(inicio, fin, inicio_rango, fin_rango)
+        ]
+
+
+def _texto_limpio(valor: Any) -> str:
+    if valor is None:
+        return ""
+    if not isinstance(valor, str):
+        valor = str(valor)
+    return valor.strip()
+
+
+def _collect_text(
+    archivos: List["_Archivo"],
+    objetivo_dt: Optional[datetime],
+    rango_inicio: Optional[datetime],
+    rango_fin: Optional[datetime],
+) -> Tuple[str, int]:
+    """Concatena los textos de los registros filtrados por rango."""
+
+    ventana = _ventana_ns(objetivo_dt, rango_inicio, rango_fin)
+    ordenes: List[int] = []
+    textos: List[str] = []
+    for archivo in archivos:
+        linea = archivo.linea
+        for i in linea.indices(ventana):
+            ordenes.append(linea.ordenes[i])
+            textos.append(linea.textos[i])
+    # Orden estable por la clave entera: los empates mantienen el orden de
+    # llegada, sin comparar tuplas en cada paso
+    indices = sorted(range(len(ordenes)), key=ordenes.__getitem__)
+    return " ".join([textos[i] for i in indices]).strip(), len(textos)
 
 
 def _collect_simple_records(
-    items: List[Tuple[str, dict]],
+    archivos: List["_Archivo"],
     objetivo_dt: Optional[datetime],
     rango_inicio: Optional[datetime],
     rango_fin: Optional[datetime],
 ) -> List[Dict[str, str]]:
     """Devuelve registros filtrados en formato simple: texto, inicio, fecha."""
 
-    seleccionados: List[Tuple[datetime, int, Dict[str, str]]] = []
-    orden_seq = 0
-    for _, entrada in items:
-        registros = entrada.get("registros", []) or []
-        for bloque in registros:
-            if not isinstance(bloque, dict):
-                continue
-            if objetivo_dt:
-                if not _record_overlaps_range(bloque, objetivo_dt, objetivo_dt):
-                    continue
-            elif rango_inicio or rango_fin:
-                if not _record_overlaps_range(bloque, rango_inicio, rango_fin):
-                    continue
-
-            texto = bloque.get("texto")
-            if texto is None:
-                continue
-            if not isinstance(texto, str):
-                texto = str(texto)
-            texto = texto.strip()
-            if not texto:
-                continue
-
-            inicio_str = bloque.get("inicio")
-            fecha_str = bloque.get("fecha")
-            if not isinstance(inicio_str, str):
-                inicio_str = "" if inicio_str is None else str(inicio_str)
-            if not isinstance(fecha_str, str):
-                fecha_str = "" if fecha_str is None else str(fecha_str)
-            inicio_str = inicio_str.strip()
-            fecha_str = fecha_str.strip()
-
-            inicio_dt, fin_dt = _get_record_bounds(bloque)
-            orden_dt = inicio_dt or fin_dt or datetime.min
+    ventana = _ventana_ns(objetivo_dt, rango_inicio, rango_fin)
+    seleccionados: List[Tuple[int, Dict[str, str]]] = []
+    for archivo in archivos:
+        linea = archivo.linea
+        for i in linea.indices(ventana):
             seleccionados.append(
                 (
-                    orden_dt,
-                    orden_seq,
+                    linea.ordenes[i],
                     {
-                        "texto": texto,
-                        "inicio": inicio_str,
-                        "fecha": fecha_str,
+                        "texto": linea.textos[i],
+                        "inicio": linea.horas[i],
+                        "fecha": linea.fechas[i],
                     },
                 )
             )
-            orden_seq += 1
 
-    seleccionados.sort(key=lambda item: (item[0], item[1]))
-    return [registro for _, _, registro in seleccionados]
+    # sort es estable: los empates mantienen el orden de llegada
+    seleccionados.sort(key=itemgetter(0))
+    return [registro for _, registro in seleccionados]
 
 
-def _build_remote_url(ruta_archivo: str) -> str:
-    medio = extraer_medio(ruta_archivo)
-    filename = os.path.basename(ruta_archivo)
+def _una_vez(clave: Tuple[Any, ...], construir: Callable[[], Any]) -> Any:
+    """Ejecuta ``construir`` una sola vez por ``clave`` entre hilos concurrentes."""
+
+    with _EN_CURSO_LOCK:
+        futuro = _EN_CURSO.get(clave)
+        propio = futuro is None
+        if propio:
+            futuro = _EN_CURSO[clave] = Future()
+    if not propio:
+        return futuro.result()
+    try:
+        resultado = construir()
+    except BaseException as exc:
+        futuro.set_exception(exc)
+        raise
+    else:
+        futuro.set_result(resultado)
+        return resultado
+    finally:
+        with _EN_CURSO_LOCK:
+            del _EN_CURSO[clave]
+
+
+def _seleccion_registros(
+    cache: Dict[str, Any],
+    items: List[Tuple[str, dict]],
+    text_only: bool,
+    objetivo_dt: Optional[datetime],
+    rango_inicio: Optional[datetime],
+    rango_fin: Optional[datetime],
+    pretty: bool = False,
+) -> Optional[Tuple[bytes, str]]:
+    """Cuerpo y ETag de ``?text`` o ``?json`` para ``items``; None si no hay registros.
+
+    Depende solo de la versión del cache, los archivos elegidos y los filtros:
+    el resultado se guarda serializado y peticiones idénticas simultáneas
+    comparten el cálculo.
+    """
+
+    clave = (
+        cache["etag"],
+        text_only,
+        tuple(ruta for ruta, _ in items),
+        objetivo_dt,
+        rango_inicio,
+        rango_fin,
+        pretty,
+    )
+    with _RESPUESTAS_LOCK:
+        if clave in _RESPUESTAS_CACHE:
+            _RESPUESTAS_CACHE.move_to_end(clave)
+            return _RESPUESTAS_CACHE[clave]
+
+    def construir() -> Optional[Tuple[bytes, str]]:
+        archivos = [cache["meta"][ruta] for ruta, _ in items]
+        if text_only:
+            texto, total = _collect_text(archivos, objetivo_dt, rango_inicio, rango_fin)
+            payload = {"texto": texto} if total and texto else None
+        else:
+            payload = (
+                _collect_simple_records(archivos, objetivo_dt, rango_inicio, rango_fin) or None
+            )
+        resultado = None
+        if payload is not None:
+            body = _encode_json(payload, pretty)
+            resultado = (body, _hash_etag(body))
+        with _RESPUESTAS_LOCK:
+            _RESPUESTAS_CACHE[clave] = resultado
+            while len(_RESPUESTAS_CACHE) > _RESPUESTAS_CACHE_SIZE:
+                _RESPUESTAS_CACHE.popitem(last=False)
+        return resultado
+
+    return _una_vez(clave, construir)
+
+
+def _join_remote_url(medio: str, filename: str) -> str:
     # Asegura un solo slash al unir base, medio y archivo
     base = BASE_URL.rstrip("/")
     return f"{base}/{medio}/{filename}"
 
 
+def _build_remote_url(ruta_archivo: str) -> str:
+    return _join_remote_url(extraer_medio(ruta_archivo), os.path.basename(ruta_archivo))
+
+
+def _encode_json(payload: Any, pretty: bool = False) -> bytes:
+    """Serializa a JSON UTF-8: compacto por defecto, indentado con ``pretty``."""
+
+    if orjson is not None:
+        # OPT_NON_STR_KEYS acepta las mismas claves que json de la stdlib
+        if pretty:
+            return orjson.dumps(
+                payload, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            )
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    if pretty:
+        return json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _encode_entrada(ruta: str, url: str, entrada: dict, pretty: bool = False) -> bytes:
+    """Serializa un elemento del listado como parte de una lista."""
+
+    body = _encode_json(
+        {
+            "file": ruta,
+            "url": url,
+            "duracion": entrada.get("duracion"),
+            "registros": entrada.get("registros", []),
+        },
+        pretty,
+    )
+    if not pretty:
+        return body
+    # Los strings JSON no contienen saltos de línea literales, así que es
+    # seguro desplazar cada línea para anidarla dentro de la lista.
+    return b"  " + body.replace(b"\n", b"\n  ")
+
+
+def _listado_etag(
+    cache: Dict[str, Any], items: List[Tuple[str, dict]], pretty: bool = False
+) -> str:
+    """ETag del listado: versión del registro, formato y rutas en orden."""
+
+    claves = "\n".join(k for k, _ in items)
+    return _hash_etag(f"{cache['etag']}\n{int(pretty)}\n{claves}".encode("utf-8"))
+
+
+def _listado_chunks(
+    cache: Dict[str, Any], items: List[Tuple[str, dict]], pretty: bool = False
+) -> List[bytes]:
+    """Devuelve el listado como trozos de bytes ya serializados."""
+
+    if not items:
+        return [b"[]"]
+    if not pretty:
+        entry_bytes = cache["entry_bytes"]
+        chunks = [b"["]
+        for k, _ in items:
+            chunks.append(entry_bytes[k])
+            chunks.append(b",")
+        chunks[-1] = b"]"
+        return chunks
+    entry_bytes = cache["entry_bytes_pretty"]
+    chunks = [b"[\n"]
+    for k, v in items:
+        body = entry_bytes.get(k)
+        if body is None:
+            body = _encode_entrada(k, cache["meta"][k].url, v, pretty=True)
+            entry_bytes[k] = body
+        chunks.append(body)
+        chunks.append(b",\n")
+    chunks[-1] = b"\n]"
+    return chunks
+
+
+# Parámetros que lee do_GET; el resto del query string se ignora sin decodificar
+_PARAMETROS = frozenset(
+    (
+        "file",
+        "fecha",
+        "medio",
+        "hora",
+        "fechahora",
+        "fechahora_inicio",
+        "fechahora_fin",
+        "hora_inicio",
+        "hora_fin",
+        "fecha_fin",
+        "text",
+        "texto",
+        "json",
+        "pretty",
+        "order",
+        "hours",
+    )
+)
+
+
+def _unquote(valor: str) -> str:
+    if "%" in valor or "+" in valor:
+        return unquote_plus(valor)
+    return valor
+
+
+def _parse_query(query: str) -> Dict[str, str]:
+    """Convierte el query string en un dict plano de un valor por parámetro.
+
+    Si un parámetro se repite prevalece el primero; los parámetros sin valor
+    (p.ej. ``text``) quedan con ``""``. Evita ``urlparse``/``parse_qsl``, que
+    hacen bastante más trabajo del que necesita esta API, y solo decodifica
+    los valores de :data:`_PARAMETROS`.
+    """
+
+    params: Dict[str, str] = {}
+    if not query:
+        return params
+    query = query.partition("#")[0]
+    for par in query.split("&"):
+        if not par:
+            continue
+        clave, _, valor = par.partition("=")
+        clave = _unquote(clave)
+        if clave in _PARAMETROS and clave not in params:
+            params[clave] = _unquote(valor)
+    return params
+
+
+# Ayuda de /docs
+_DOCS: Dict[str, Any] = {
+    "endpoints": {
+        "/": {
+            "desc": "Lista transcripciones combinadas (por archivo)",
+            "query": {
+                "file": "Ruta exacta del archivo para obtener solo ese registro",
+                "fecha": "YYYY-MM-DD para filtrar por día",
+                "hora": "HH:MM[:SS] para traer el bloque que cubre esa hora (requiere 'fecha')",
+                "fechahora": "YYYY-MM-DD HH:MM[:SS] para apuntar a un bloque usando un solo parámetro",
+                "fechahora_inicio": "Inicio del rango en formato YYYY-MM-DD HH:MM[:SS]",
+                "fechahora_fin": "Fin del rango en formato YYYY-MM-DD HH:MM[:SS]",
+                "hora_inicio": "HH:MM[:SS] como inicio del rango (requiere 'fecha')",
+                "hora_fin": "HH:MM[:SS] como fin del rango (requiere 'fecha' o 'fecha_fin')",
+                "fecha_fin": "Permite indicar un día distinto para 'hora_fin'",
+                "medio": "Nombre de la carpeta canal (p.ej. Canal13)",
+                "hours": f"Ventana en horas (int), por defecto {DEFAULT_HOURS}",
+                "order": "Orden de los resultados (por defecto antiguos primero; usar 'newest' o 'reciente')",
+                "text": "Si está presente, devuelve un solo texto concatenado del rango solicitado",
+                "json": "Si está presente, devuelve una lista plana con {texto, inicio, fecha}",
+                "pretty": "Si está presente, devuelve el JSON indentado (por defecto compacto)",
+            },
+            "examples": [
+                "/?medio=Canal13",
+                "/?fecha=2025-07-22",
+                "/?hours=24",
+                "/?medio=Canal13&hours=12",
+                "/?medio=Canal13&order=newest",
+                "/?fecha=2025-10-24&hora=13:00:00",
+                "/?fechahora=2025-10-24T13:00:00",
+                "/?fecha=2025-10-24&hora_inicio=13:00&hora_fin=14:00",
+                "/?fechahora_inicio=2025-10-24 12:50&fechahora_fin=2025-10-24 13:10",
+                "/?fecha=2025-10-24&hora_inicio=13:00&hora_fin=14:00&medio=Canal13&text",
+                "/?fecha=2025-10-24&hora_inicio=13:00&hora_fin=14:00&medio=Canal13&json",
+                "/?medio=Canal13&pretty",
+            ],
+            "notes": [
+                "Los resultados vienen ordenados por defecto desde el archivo más antiguo al más reciente.",
+                "Agrega order=newest (o order=reciente) para invertir y ver primero los más nuevos.",
+                "Combina fecha y hora para recuperar directamente el bloque que cubre ese instante.",
+                "Cuando uses 'hora_inicio' o 'hora_fin' incluye también 'fecha' (y 'fecha_fin' si corresponde).",
+                "Cuando uses 'text', el filtro de rango incluye un margen de 1 segundo.",
+                "Cuando uses 'json', el filtro de rango usa la misma lógica que 'text'.",
+            ],
+        },
+        "/docs": {
+            "desc": "Este documento de ayuda (JSON)",
+        },
+    }
+}
+# Constante: se serializa una sola vez. La ayuda está pensada para leerse
+# directamente, así que siempre va indentada.
+_DOCS_BODY = _encode_json(_DOCS, pretty=True)
+_DOCS_ETAG = _hash_etag(_DOCS_BODY)
+
+
 class Handler(BaseHTTPRequestHandler):
+    # HTTP/1.1 mantiene la conexión abierta entre peticiones (todas las
+    # respuestas llevan Content-Length); el timeout libera conexiones ociosas.
+    protocol_version = "HTTP/1.1"
+    timeout = 60
+    # JSON indentado solo si la petición lo pide con ?pretty
+    pretty = False
+
     def _write_json(self, payload: Any, status: int = 200) -> None:
-        body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        body = _encode_json(payload, self.pretty)
+        self._write_body(body, status, etag=_hash_etag(body))
+
+    def _write_body(self, body: bytes, status: int = 200, etag: Optional[str] = None) -> None:
+        self._write_chunks((body,), status, etag)
+
+    @staticmethod
+    def _cache_control() -> str:
+        if CACHE_MAX_AGE <= 0:
+            return "no-cache"
+        return f"max-age={CACHE_MAX_AGE}, must-revalidate"
+
+    def _write_chunks(
+        self, chunks: List[bytes], status: int = 200, etag: Optional[str] = None
+    ) -> None:
+        """Envía el cuerpo por partes, agrupando trozos pequeños por escritura.
+
+        Si se entrega ``etag`` y el cliente ya tiene esa versión
+        (``If-None-Match``), responde ``304`` sin cuerpo.
+        """
+
+        total = sum(map(len, chunks))
+        usar_gzip = total >= _GZIP_MIN_BYTES and _acepta_gzip(
+            self.headers.get("Accept-Encoding")
+        )
+        etag_respuesta = _gzip_etag(etag) if etag and usar_gzip else etag
+        if (
+            etag_respuesta
+            and status == 200
+            and _etag_coincide(self.headers.get("If-None-Match"), etag_respuesta)
+        ):
+            self.send_response(304)
+            self.send_header("ETag", etag_respuesta)
+            self.send_header("Cache-Control", self._cache_control())
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+        if usar_gzip:
+            chunks = (_comprimir(chunks, etag),)
+            total = len(chunks[0])
         self.send_response(status)
         self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Length", str(total))
+        if usar_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Vary", "Accept-Encoding")
+        if etag_respuesta:
+            self.send_header("ETag", etag_respuesta)
+            if status == 200:
+                self.send_header("Cache-Control", self._cache_control())
         self.end_headers()
         try:
-            self.wfile.write(body)
+            lote: List[bytes] = []
+            lote_bytes = 0
+            for chunk in chunks:
+                if len(chunk) > _WRITE_BATCH_BYTES:
+                    # Cuerpos grandes (p.ej. ?json o gzip) se envían por tramos
+                    # sin copiarlos: el timeout del socket aplica a cada tramo
+                    if lote:
+                        self.wfile.write(b"".join(lote))
+                        lote = []
+                        lote_bytes = 0
+                    vista = memoryview(chunk)
+                    for inicio in range(0, len(vista), _WRITE_BATCH_BYTES):
+                        self.wfile.write(vista[inicio : inicio + _WRITE_BATCH_BYTES])
+                    continue
+                lote.append(chunk)
+                lote_bytes += len(chunk)
+                if lote_bytes >= _WRITE_BATCH_BYTES:
+                    self.wfile.write(b"".join(lote))
+                    lote = []
+                    lote_bytes = 0
+            if lote:
+                self.wfile.write(b"".join(lote))
         except (BrokenPipeError, ConnectionResetError, TimeoutError) as exc:
             self.log_error("Client disconnected before response was sent: %r", exc)
             self.close_connection = True
 
     def do_GET(self):
-        parsed = urlparse(self.path)
-        if parsed.path == "/docs":
+        path, _, query = self.path.partition("?")
+        self.pretty = False
+        if path == "/docs":
             self._send_docs()
             return
-        if parsed.path != "/":
+        if path != "/":
             self.send_error(404)
             return
-        qs = parse_qs(parsed.query, keep_blank_values=True)
-        archivo = qs.get("file", [None])[0]
-        filtro_fecha = qs.get("fecha", [None])[0]
-        filtro_medio = qs.get("medio", [None])[0]
-        filtro_hora = qs.get("hora", [None])[0]
-        filtro_fechahora = qs.get("fechahora", [None])[0]
-        filtro_fechahora_inicio = qs.get("fechahora_inicio", [None])[0]
-        filtro_fechahora_fin = qs.get("fechahora_fin", [None])[0]
-        filtro_hora_inicio = qs.get("hora_inicio", [None])[0]
-        filtro_hora_fin = qs.get("hora_fin", [None])[0]
-        filtro_fecha_fin = qs.get("fecha_fin", [None])[0]
+        qs = _parse_query(query)
+        archivo = qs.get("file")
+        filtro_fecha = qs.get("fecha")
+        filtro_medio = qs.get("medio")
+        filtro_hora = qs.get("hora")
+        filtro_fechahora = qs.get("fechahora")
+        filtro_fechahora_inicio = qs.get("fechahora_inicio")
+        filtro_fechahora_fin = qs.get("fechahora_fin")
+        filtro_hora_inicio = qs.get("hora_inicio")
+        filtro_hora_fin = qs.get("hora_fin")
+        filtro_fecha_fin = qs.get("fecha_fin")
         text_only = "text" in qs or "texto" in qs
         json_only = "json" in qs
-        order_param = (qs.get("order", [None])[0] or "").lower()
+        self.pretty = qs.get("pretty", "0").lower() not in ("0", "false", "no")
+        order_param = (qs.get("order") or "").lower()
         ordenar_desc = order_param in ORDER_DESC_VALUES
         try:
-            filtro_horas = int(qs.get("hours", [DEFAULT_HOURS])[0])
+            filtro_horas = int(qs.get("hours", DEFAULT_HOURS))
         except ValueError:
             filtro_horas = DEFAULT_HOURS
         if text_only and json_only:
@@ -544,188 +1356,135 @@ class Handler(BaseHTTPRequestHandler):
             self.send_error(400, "'fechahora_inicio' debe ser anterior a 'fechahora_fin'")
             return
 
-        registro, error = cargar_registros()
+        cache, error = obtener_cache()
         if error:
             self.send_error(500, error)
             return
         if archivo:
-            datos = registro.get(archivo)
-            if datos is None:
+            # Búsqueda directa en el cache: no se lee ningún archivo de disco
+            encontrado = cache["meta"].get(archivo)
+            if encontrado is None:
                 self.send_error(404, "Archivo no encontrado en el registro")
                 return
-            if objetivo_dt and not _block_contains_datetime(archivo, datos, objetivo_dt):
+            datos = encontrado.entrada
+            if objetivo_dt and not _bounds_contain(encontrado.inicio, encontrado.fin, objetivo_dt):
                 self.send_error(404, "El archivo no contiene la fecha y hora solicitadas")
                 return
-            if (rango_inicio or rango_fin) and not _block_overlaps_range(archivo, datos, rango_inicio, rango_fin):
+            if not _bounds_overlap_range(encontrado.inicio, encontrado.fin, rango_inicio, rango_fin):
                 self.send_error(404, "El archivo no intersecta con el rango solicitado")
                 return
-            if text_only:
-                texto, total = _collect_text(
+            if text_only or json_only:
+                seleccion = _seleccion_registros(
+                    cache,
                     [(archivo, datos)],
+                    text_only,
                     objetivo_dt,
                     rango_inicio,
                     rango_fin,
+                    self.pretty,
                 )
-                if total == 0 or not texto:
+                if seleccion is None:
                     self.send_error(404, "No se encontraron registros en el rango indicado")
                     return
-                self._write_json({"texto": texto})
+                body, etag = seleccion
+                self._write_body(body, etag=etag)
                 return
-            if json_only:
-                registros_simple = _collect_simple_records(
-                    [(archivo, datos)],
-                    objetivo_dt,
-                    rango_inicio,
-                    rango_fin,
-                )
-                if not registros_simple:
-                    self.send_error(404, "No se encontraron registros en el rango indicado")
-                    return
-                self._write_json(registros_simple)
+            if not datos.get("registros"):
+                self.send_error(404, "Archivo sin transcripciones")
+                return
+            video_existe = os.path.exists(archivo)
+            if video_existe and not self.pretty:
+                # Mismo contenido que el elemento del listado, ya serializado
+                body = cache["entry_bytes"][archivo]
+                self._write_body(body, etag=_hash_etag(body))
                 return
             respuesta = {
                 "file": archivo,
-                "url": _build_remote_url(archivo),
+                "url": encontrado.url,
                 "duracion": datos.get("duracion"),
                 "registros": datos.get("registros", []),
             }
-            if not respuesta["registros"]:
-                self.send_error(404, "Archivo sin transcripciones")
-                return
-            if not os.path.exists(archivo):
+            if not video_existe:
                 respuesta["warning"] = "Archivo de video no encontrado"
         else:
-            items = registro.items()
-            if filtro_fecha:
-                items = [
-                    (k, v)
-                    for k, v in items
-                    if extraer_fecha(k) == filtro_fecha
-                ]
-            if filtro_medio:
-                items = [
-                    (k, v)
-                    for k, v in items
-                    if extraer_medio(k) == filtro_medio
-                ]
-            # Filtrar por ventana de horas (por defecto 48h)
+            if filtro_fecha and filtro_medio:
+                indice = cache["by_fecha_medio"].get((filtro_fecha, filtro_medio))
+            elif filtro_fecha:
+                indice = cache["by_fecha"].get(filtro_fecha)
+            elif filtro_medio:
+                indice = cache["by_medio"].get(filtro_medio)
+            else:
+                indice = cache["indice"]
+            # La ventana de horas (por defecto 48h) y los archivos que empiezan
+            # después del instante o del fin del rango se resuelven con bisect
             limite = datetime.now() - timedelta(hours=filtro_horas)
-            items = [
-                (k, v)
-                for k, v in items
-                if (dt := extraer_datetime(k)) is not None and dt >= limite
-            ]
-            if objetivo_dt:
-                items = [
-                    (k, v)
-                    for k, v in items
-                    if _block_contains_datetime(k, v, objetivo_dt)
-                ]
-                if not items:
-                    self.send_error(404, "No se encontró un bloque para la fecha y hora indicadas")
-                    return
-            if rango_inicio or rango_fin:
-                items = [
-                    (k, v)
-                    for k, v in items
-                    if _block_overlaps_range(k, v, rango_inicio, rango_fin)
-                ]
+            maximo = objetivo_dt or rango_fin
+            candidatos = (
+                indice.entre(limite, maximo, ordenar_desc) if indice is not None else ()
+            )
+            # Una sola pasada sobre lo que queda: instante y rango. El índice ya
+            # entrega los archivos en el orden pedido (por defecto, más
+            # antiguos primero), así que el listado no se reordena
+            filtrar_rango = rango_inicio is not None or rango_fin is not None
+            hay_objetivo = False
+            items = []
+            for candidato in candidatos:
+                if objetivo_dt:
+                    if not _bounds_contain(candidato.inicio, candidato.fin, objetivo_dt):
+                        continue
+                    hay_objetivo = True
+                if filtrar_rango and not _bounds_overlap_range(
+                    candidato.inicio, candidato.fin, rango_inicio, rango_fin
+                ):
+                    continue
+                items.append((candidato.ruta, candidato.entrada))
+            if objetivo_dt and not hay_objetivo:
+                self.send_error(404, "No se encontró un bloque para la fecha y hora indicadas")
+                return
             if not items:
                 self.send_error(404, "No se encontraron bloques en el rango indicado")
                 return
-            if text_only:
-                texto, total = _collect_text(
-                    items,
-                    objetivo_dt,
-                    rango_inicio,
-                    rango_fin,
-                )
-                if total == 0 or not texto:
-                    self.send_error(404, "No se encontraron registros en el rango indicado")
-                    return
-                self._write_json({"texto": texto})
-                return
-            if json_only:
-                registros_simple = _collect_simple_records(
+            if text_only or json_only:
+                # Los textos se combinan en el orden del registro
+                posicion = cache["posicion"]
+                items.sort(key=lambda item: posicion[item[0]])
+                seleccion = _seleccion_registros(
+                    cache,
                     items,
+                    text_only,
                     objetivo_dt,
                     rango_inicio,
                     rango_fin,
+                    self.pretty,
                 )
-                if not registros_simple:
+                if seleccion is None:
                     self.send_error(404, "No se encontraron registros en el rango indicado")
                     return
-                self._write_json(registros_simple)
+                body, etag = seleccion
+                self._write_body(body, etag=etag)
                 return
-            # Ordenar por fecha/hora (más antiguos primero por defecto)
-            items.sort(
-                key=lambda item: extraer_datetime(item[0]) or datetime.min,
-                reverse=ordenar_desc,
+            self._write_chunks(
+                _listado_chunks(cache, items, self.pretty),
+                etag=_listado_etag(cache, items, self.pretty),
             )
-            respuesta = [
-                {
-                    "file": k,
-                    "url": _build_remote_url(k),
-                    "duracion": v.get("duracion"),
-                    "registros": v.get("registros", []),
-                }
-                for k, v in items
-            ]
+            return
         self._write_json(respuesta)
 
     def _send_docs(self) -> None:
-        docs = {
-            "endpoints": {
-                "/": {
-                    "desc": "Lista transcripciones combinadas (por archivo)",
-                    "query": {
-                        "file": "Ruta exacta del archivo para obtener solo ese registro",
-                        "fecha": "YYYY-MM-DD para filtrar por día",
-                        "hora": "HH:MM[:SS] para traer el bloque que cubre esa hora (requiere 'fecha')",
-                        "fechahora": "YYYY-MM-DD HH:MM[:SS] para apuntar a un bloque usando un solo parámetro",
-                        "fechahora_inicio": "Inicio del rango en formato YYYY-MM-DD HH:MM[:SS]",
-                        "fechahora_fin": "Fin del rango en formato YYYY-MM-DD HH:MM[:SS]",
-                        "hora_inicio": "HH:MM[:SS] como inicio del rango (requiere 'fecha')",
-                        "hora_fin": "HH:MM[:SS] como fin del rango (requiere 'fecha' o 'fecha_fin')",
-                        "fecha_fin": "Permite indicar un día distinto para 'hora_fin'",
-                        "medio": "Nombre de la carpeta canal (p.ej. Canal13)",
-                        "hours": f"Ventana en horas (int), por defecto {DEFAULT_HOURS}",
-                        "order": "Orden de los resultados (por defecto antiguos primero; usar 'newest' o 'reciente')",
-                        "text": "Si está presente, devuelve un solo texto concatenado del rango solicitado",
-                        "json": "Si está presente, devuelve una lista plana con {texto, inicio, fecha}",
-                    },
-                    "examples": [
-                        "/?medio=Canal13",
-                        "/?fecha=2025-07-22",
-                        "/?hours=24",
-                        "/?medio=Canal13&hours=12",
-                        "/?medio=Canal13&order=newest",
-                        "/?fecha=2025-10-24&hora=13:00:00",
-                        "/?fechahora=2025-10-24T13:00:00",
-                        "/?fecha=2025-10-24&hora_inicio=13:00&hora_fin=14:00",
-                        "/?fechahora_inicio=2025-10-24 12:50&fechahora_fin=2025-10-24 13:10",
-                        "/?fecha=2025-10-24&hora_inicio=13:00&hora_fin=14:00&medio=Canal13&text",
-                        "/?fecha=2025-10-24&hora_inicio=13:00&hora_fin=14:00&medio=Canal13&json",
-                    ],
-                    "notes": [
-                        "Los resultados vienen ordenados por defecto desde el archivo más antiguo al más reciente.",
-                        "Agrega order=newest (o order=reciente) para invertir y ver primero los más nuevos.",
-                        "Combina fecha y hora para recuperar directamente el bloque que cubre ese instante.",
-                        "Cuando uses 'hora_inicio' o 'hora_fin' incluye también 'fecha' (y 'fecha_fin' si corresponde).",
-                        "Cuando uses 'text', el filtro de rango incluye un margen de 1 segundo.",
-                        "Cuando uses 'json', el filtro de rango usa la misma lógica que 'text'.",
-                    ],
-                },
-                "/docs": {
-                    "desc": "Este documento de ayuda (JSON)",
-                },
-            }
-        }
-        self._write_json(docs)
+        self._write_body(_DOCS_BODY, etag=_DOCS_ETAG)
+
+
+class _Servidor(ThreadingHTTPServer):
+    # La cola por defecto de listen() (5) rechaza conexiones en ráfagas de
+    # clientes concurrentes aunque haya hilos libres para atenderlas
+    request_queue_size = 128
 
 
 def run(port: int = 8000) -> None:
-    server = HTTPServer(("", port), Handler)
+    # Un hilo por petición: un cliente lento no bloquea al resto. El cache del
+    # registro es compartido y de solo lectura para los handlers.
+    server = _Servidor(("", port), Handler)
+    iniciar_refresco()
     print(f"Servidor escuchando en http://localhost:{port}")
     server.serve_forever()
 
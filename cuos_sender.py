@@ -5,17 +5,27 @@ from __future__ import annotations
 import json
 import os
 import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, Optional
+from typing import Dict, Iterable, Iterator, Optional, Set
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
 
 ENV_ENDPOINT = "CUOS_ENDPOINT"
 REQUEST_TIMEOUT = 5
 HEADERS = {"Content-Type": "application/json"}
+POOL_MAXSIZE = 32
+MAX_WORKERS = 8
 
-_ENV_LOADED = False
-_ENV_LOCK = threading.Lock()
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
 
 
 def _load_env_file(path: Path) -> None:
@@ -35,17 +45,34 @@ def _load_env_file(path: Path) -> None:
         return
 
 
-def _ensure_env_loaded() -> None:
-    global _ENV_LOADED  # noqa: PLW0603
-    if _ENV_LOADED:
-        return
-    with _ENV_LOCK:
-        if _ENV_LOADED:
-            return
-        env_path = Path(".env")
-        if env_path.exists():
-            _load_env_file(env_path)
-        _ENV_LOADED = True
+# Read .env once at import time, like the other modules do.
+_load_env_file(Path(".env"))
+
+
+def _get_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use.
+
+    Reusing one session keeps connections to the CUOS endpoint alive between
+    ``send_payloads`` calls instead of paying a new TCP/TLS handshake each time.
+    Only connection failures are retried: a POST that reached the server is
+    never resent, to avoid duplicated records.
+    """
+
+    global _SESSION  # noqa: PLW0603
+    if _SESSION is not None:
+        return _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            adapter = HTTPAdapter(
+                pool_maxsize=POOL_MAXSIZE,
+                max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.3),
+            )
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _SESSION = session
+    return _SESSION
 
 
 def _clean_inicio(value: str) -> str:
@@ -65,6 +92,8 @@ def iter_payloads(
 ) -> Iterator[Dict[str, str]]:
     """Yield payloads ready to POST to the CUOS API.
 
+    Identical payloads (same medio, date and text) are yielded only once.
+
     Parameters
     ----------
     source:
@@ -74,7 +103,10 @@ def iter_payloads(
         Works with both dict and list based JSON layouts.
     """
 
-    raw = json.loads(source.read_text(encoding="utf-8"))
+    if orjson is not None:
+        raw = orjson.loads(source.read_bytes())
+    else:
+        raw = json.loads(source.read_text(encoding="utf-8"))
 
     keys_filter = set(only_keys or [])
     if isinstance(raw, dict):
@@ -100,6 +132,7 @@ def iter_payloads(
     else:
         entries = []
 
+    seen = set()
     for entry in entries:
         if not isinstance(entry, dict):
             continue
@@ -118,6 +151,10 @@ def iter_payloads(
             texto = (registro.get("texto") or "").strip()
             if not (fecha and inicio and texto):
                 continue
+            key = (medio, date, texto)
+            if key in seen:
+                continue
+            seen.add(key)
             yield {
                 "type": "Radio",
                 "media_cuos": medio,
@@ -127,21 +164,36 @@ def iter_payloads(
 
 
 def get_endpoint() -> Optional[str]:
-    """Return the CUOS endpoint, loading environment once if needed."""
+    """Return the CUOS endpoint configured in the environment (or .env)."""
 
-    _ensure_env_loaded()
     endpoint = os.getenv(ENV_ENDPOINT, "").strip()
     return endpoint or None
 
 
+def _post(session: requests.Session, endpoint: str, payload: Dict[str, str]) -> None:
+    response = session.post(endpoint, json=payload, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+
+
+def _collect(done: Set["Future[None]"]) -> int:
+    """Return how many finished posts succeeded, re-raising the first failure."""
+
+    for future in done:
+        future.result()
+    return len(done)
+
+
 def send_payloads(
     source: Path,
     only_keys: Optional[Iterable[str]] = None,
 ) -> int:
     """Send payloads generated from `source` to the CUOS API.
 
-    Returns the number of payloads successfully posted. Raises RuntimeError
-    if the endpoint is missing or request execution fails.
+    Posts run concurrently on up to ``MAX_WORKERS`` threads sharing the
+    keep-alive session; at most ``2 * MAX_WORKERS`` are in flight, so large
+    sources are not materialized up front. Returns the number of payloads
+    successfully posted. Raises RuntimeError if the endpoint is missing or a
+    request fails (pending posts are cancelled).
     """
 
     if not source.exists():
@@ -151,22 +203,25 @@ def send_payloads(
     if not endpoint:
         raise RuntimeError("No CUOS endpoint configured via .env or default.")
 
-    session = requests.Session()
+    session = _get_session()
     enviados = 0
+    pending: Set["Future[None]"] = set()
     try:
-        for payload in iter_payloads(source, only_keys):
-            response = session.post(
-                endpoint,
-                json=payload,
-                headers=HEADERS,
-                timeout=REQUEST_TIMEOUT,
-            )
-            response.raise_for_status()
-            enviados += 1
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            try:
+                for payload in iter_payloads(source, only_keys):
+                    if len(pending) >= 2 * MAX_WORKERS:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        enviados += _collect(done)
+                    pending.add(executor.submit(_post, session, endpoint, payload))
+                done, pending = wait(pending)
+                enviados += _collect(done)
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
     except requests.RequestException as exc:
         raise RuntimeError(f"Error enviando payloads a CUOS: {exc}") from exc
-    finally:
-        session.close()
     return enviados
 
 
@@ -1,11 +1,16 @@
 from vosk import Model, KaldiRecognizer
-import wave
 import subprocess
 import json
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
-import tempfile
+import queue
 import threading
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional; se usa json de la stdlib
+    orjson = None
 
 
 def _load_env_file(path: str = ".env") -> None:
@@ -62,10 +67,74 @@ def _get_model(modelo_path: str) -> Model:
         return m
 
 PAUSA_MAX = 0.5  # segundos para cortar frase
+FRECUENCIA_MUESTREO = 16000
+# Bytes por lectura del audio decodificado (1 s de PCM 16 bits mono): menos
+# vueltas entre Python y Kaldi
+BYTES_POR_LECTURA = 2 * FRECUENCIA_MUESTREO
+# Lecturas que ffmpeg puede adelantar mientras Vosk procesa (~8 s de audio)
+LECTURAS_EN_COLA = 8
+# Archivos más chicos no alcanzan a tener audio (grabación cortada o aún en
+# escritura): se devuelven sin bloques y sin lanzar ffmpeg. procesar_videos los
+# salta antes para no registrarlos como procesados.
+TAMANO_MINIMO_BYTES = 1024
+
+_REC_LOCAL = threading.local()
+
+
+def _get_recognizer(model: Model) -> KaldiRecognizer:
+    """Devuelve un reconocedor reiniciado para ``model``, uno por hilo.
+
+    Construir ``KaldiRecognizer`` reserva el grafo de decodificación y sus
+    buffers; entre archivos basta con ``Reset()``.
+    """
+    cache = getattr(_REC_LOCAL, "cache", None)
+    if cache is None:
+        cache = _REC_LOCAL.cache = {}
+    clave = (id(model), FRECUENCIA_MUESTREO)
+    rec = cache.get(clave)
+    if rec is None:
+        rec = KaldiRecognizer(model, FRECUENCIA_MUESTREO)
+        rec.SetWords(True)
+        cache[clave] = rec
+    else:
+        # Descarta lo que haya quedado de un archivo interrumpido
+        rec.Reset()
+    return rec
+
 
+def _leer_pcm(salida, cola: "queue.Queue[bytes]") -> None:
+    """Pasa el PCM de ffmpeg a ``cola`` por tramos; ``b""`` marca el final."""
+
+    try:
+        while True:
+            data = salida.read(BYTES_POR_LECTURA)
+            cola.put(data)
+            if not data:
+                return
+    except (OSError, ValueError):
+        cola.put(b"")
+
+
+def _palabras_resultado(resultado: str) -> list:
+    """Devuelve las palabras de un resultado de Vosk (``Result``/``FinalResult``).
+
+    Los tramos de silencio llegan como ``{"text" : ""}`` sin ``result``; en ese
+    caso no se parsea el JSON.
+    """
+
+    if '"result"' not in resultado:
+        return []
+    res = orjson.loads(resultado) if orjson is not None else json.loads(resultado)
+    return res.get("result", [])
+
+@lru_cache(maxsize=4096)
 def extraer_hora_desde_nombre(nombre_archivo):
     
-    """Devuelve la fecha y hora como :class:`datetime` a partir del nombre."""
+    """Devuelve la fecha y hora como :class:`datetime` a partir del nombre.
+
+    Memoizada: los mismos nombres se consultan en cada vuelta del orquestador
+    y el resultado (inmutable) depende solo del nombre.
+    """
 
     base, _ = os.path.splitext(os.path.basename(nombre_archivo))
     partes = base.split("_")
@@ -73,8 +142,35 @@ def extraer_hora_desde_nombre(nombre_archivo):
         raise ValueError(f"Nombre de archivo invalido: {nombre_archivo}")
     fecha_str = partes[1]
     hora_str = partes[2]
+    if (
+        len(fecha_str) == 10
+        and fecha_str[4] == fecha_str[7] == "-"
+        and len(hora_str) == 8
+        and hora_str[2] == hora_str[5] == "-"
+    ):
+        # Forma habitual YYYY-MM-DD_HH-MM-SS: fromisoformat evita strptime
+        try:
+            return datetime.fromisoformat(
+                f"{fecha_str} {hora_str[:2]}:{hora_str[3:5]}:{hora_str[6:]}"
+            )
+        except ValueError:
+            pass
     return datetime.strptime(f"{fecha_str} {hora_str}", "%Y-%m-%d %H-%M-%S")
 
+
+def _formatear_hora(base_us: int, segundos: float) -> str:
+    """Devuelve ``HH:MM:SS.mmm`` de ``base_us`` (µs desde medianoche) + ``segundos``.
+
+    Equivale a ``(hora_inicio + timedelta(seconds=segundos)).strftime(
+    "%H:%M:%S.%f")[:-3]`` pero solo con aritmética entera.
+    """
+
+    total = base_us + round(segundos * 1_000_000)
+    return (
+        f"{total // 3_600_000_000 % 24:02d}:{total // 60_000_000 % 60:02d}"
+        f":{total // 1_000_000 % 60:02d}.{total // 1000 % 1000:03d}"
+    )
+
 def procesar_audio_con_pausas(archivo, modelo_path="vosk-model-es-0.42"):
     print(f"Procesando archivo: {archivo}")
     """Devuelve la transcripción en bloques con información de tiempo y medio.
@@ -86,117 +182,116 @@ def procesar_audio_con_pausas(archivo, modelo_path="vosk-model-es-0.42"):
     if extension not in {".mp4", ".ogg"}:
         raise ValueError("Solo se pueden procesar archivos MP4 u OGG")
 
-    fd, wav_temp = tempfile.mkstemp(prefix="vosk_tmp_", suffix=".wav")
-    os.close(fd)
-    duracion_archivo_seg = 0.0
-    wf = None
-    try:
-        proc = subprocess.run(
-            [
-                "ffmpeg",
-                "-y",
-                "-i",
-                archivo,
-                "-ar",
-                "16000",
-                "-ac",
-                "1",
-                "-f",
-                "wav",
-                wav_temp,
-            ],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        if proc.returncode != 0:
-            raise RuntimeError("ffmpeg fallo al convertir a wav")
-
-        wf = wave.open(wav_temp, "rb")
-        try:
-            model_path = _resolve_model_path(modelo_path)
-            if not os.path.isdir(model_path):
-                raise FileNotFoundError(
-                    f"Modelo Vosk no encontrado en {model_path}. "
-                    "Revise DEV_VOSK_MODEL_PATH o VOSK_MODEL_PATH."
-                )
-            model = _get_model(model_path)
-            rec = KaldiRecognizer(model, wf.getframerate())
-            rec.SetWords(True)
-        except Exception:
-            wf.close()
-            raise
-        duracion_archivo_seg = wf.getnframes() / float(wf.getframerate())
-
-        hora_inicio = extraer_hora_desde_nombre(archivo)
-        fecha = hora_inicio.strftime("%Y-%m-%d")
-        medio = os.path.basename(os.path.dirname(archivo))
-        palabras = []
+    if os.path.getsize(archivo) < TAMANO_MINIMO_BYTES:
+        print(f"Archivo vacío o truncado, se omite: {archivo}")
+        return [], 0.0
 
+    model_path = _resolve_model_path(modelo_path)
+    if not os.path.isdir(model_path):
+        raise FileNotFoundError(
+            f"Modelo Vosk no encontrado en {model_path}. "
+            "Revise DEV_VOSK_MODEL_PATH o VOSK_MODEL_PATH."
+        )
+    model = _get_model(model_path)
+    rec = _get_recognizer(model)
+
+    hora_inicio = extraer_hora_desde_nombre(archivo)
+    fecha = hora_inicio.date().isoformat()
+    medio = os.path.basename(os.path.dirname(archivo))
+    palabras = []
+
+    # ffmpeg entrega PCM mono de 16 bits por stdout: Vosk transcribe mientras
+    # se decodifica, sin escribir ni releer un wav temporal.
+    proc = subprocess.Popen(
+        [
+            "ffmpeg",
+            "-v",
+            "quiet",
+            "-i",
+            archivo,
+            "-ar",
+            str(FRECUENCIA_MUESTREO),
+            "-ac",
+            "1",
+            "-f",
+            "s16le",
+            "-",
+        ],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        bufsize=1 << 20,
+    )
+    # Un hilo lee el pipe mientras Vosk reconoce el tramo anterior; la cola
+    # acotada frena a ffmpeg si el reconocimiento se atrasa.
+    cola: "queue.Queue[bytes]" = queue.Queue(maxsize=LECTURAS_EN_COLA)
+    lector = threading.Thread(target=_leer_pcm, args=(proc.stdout, cola), daemon=True)
+    lector.start()
+    total_bytes = 0
+    try:
         while True:
-            data = wf.readframes(4000)
-            if len(data) == 0:
+            data = cola.get()
+            if not data:
                 break
+            total_bytes += len(data)
             if rec.AcceptWaveform(data):
-                res = json.loads(rec.Result())
-                palabras.extend(res.get("result", []))
-
-        bloques = []
-        actual = {"inicio": None, "fin": None, "texto": ""}
-
-        def _crear_bloque(inicio_rel: float, fin_rel: float, texto: str) -> dict:
-            duracion_rel = round(fin_rel - inicio_rel, 3)
-            inicio_abs = (
-                hora_inicio + timedelta(seconds=inicio_rel)
-            ).strftime("%H:%M:%S.%f")[:-3]
-            fin_abs = (
-                hora_inicio + timedelta(seconds=fin_rel)
-            ).strftime("%H:%M:%S.%f")[:-3]
-            return {
-                "texto": texto.strip(),
-                "inicio": inicio_abs,
-                "fin": fin_abs,
-                "fecha": fecha,
-                "duracion": duracion_rel,
-                "medio": medio,
-            }
-
-        for i, palabra in enumerate(palabras):
-            start = palabra["start"]
-            end = palabra["end"]
-            word = palabra["word"]
-
-            if actual["inicio"] is None:
-                actual["inicio"] = start
-
-            if i > 0:
-                pausa = start - palabras[i-1]["end"]
-                if pausa > PAUSA_MAX and actual["fin"] is not None:
-                    bloques.append(
-                        _crear_bloque(actual["inicio"], actual["fin"], actual["texto"])
-                    )
-                    actual = {"inicio": start, "fin": None, "texto": ""}
-
-            actual["fin"] = end
-            actual["texto"] += word + " "
-
-        # Agregar último bloque
-        if actual["texto"].strip() and actual["fin"] is not None:
-            bloques.append(
-                _crear_bloque(actual["inicio"], actual["fin"], actual["texto"])
-            )
-
+                palabras.extend(_palabras_resultado(rec.Result()))
+        # Lo que quedó pendiente tras el último corte (si no, se pierde el final)
+        palabras.extend(_palabras_resultado(rec.FinalResult()))
+    except BaseException:
+        proc.kill()
+        # Vaciar la cola para que el lector no quede bloqueado en put()
+        while lector.is_alive():
+            try:
+                cola.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        raise
     finally:
-        try:
-            # Cerrar si quedó abierto y limpiar temp
-            if wf is not None:
-                try:
-                    wf.close()
-                except Exception:
-                    pass
-            if os.path.exists(wav_temp):
-                os.remove(wav_temp)
-        except Exception:
-            pass
+        lector.join()
+        proc.stdout.close()
+        returncode = proc.wait()
+    if returncode != 0:
+        raise RuntimeError("ffmpeg fallo al decodificar el audio")
+    duracion_archivo_seg = total_bytes / (2 * FRECUENCIA_MUESTREO)
+
+    base_us = (
+        (hora_inicio.hour * 60 + hora_inicio.minute) * 60 + hora_inicio.second
+    ) * 1_000_000 + hora_inicio.microsecond
+
+    def _crear_bloque(inicio_rel: float, fin_rel: float, palabras_bloque: list) -> dict:
+        texto = " ".join(palabras_bloque)
+        duracion_rel = round(fin_rel - inicio_rel, 3)
+        inicio_abs = _formatear_hora(base_us, inicio_rel)
+        fin_abs = _formatear_hora(base_us, fin_rel)
+        return {
+            "texto": texto.strip(),
+            "inicio": inicio_abs,
+            "fin": fin_abs,
+            "fecha": fecha,
+            "duracion": duracion_rel,
+            "medio": medio,
+        }
+
+    # Columnas paralelas: los cortes se ubican en una sola pasada sobre las
+    # pausas entre palabras y cada bloque es un tramo [desde, hasta).
+    inicios = [palabra["start"] for palabra in palabras]
+    fines = [palabra["end"] for palabra in palabras]
+    textos = [palabra["word"] for palabra in palabras]
+    cortes = [
+        i
+        for i, (inicio, fin_previo) in enumerate(zip(inicios[1:], fines), 1)
+        if inicio - fin_previo > PAUSA_MAX
+    ]
+    limites = [0, *cortes, len(palabras)]
+
+    bloques = []
+    for desde, hasta in zip(limites, limites[1:]):
+        ultimo = hasta == len(palabras)
+        # El último bloque solo se agrega si tiene texto
+        if ultimo and not " ".join(textos[desde:hasta]).strip():
+            continue
+        bloques.append(_crear_bloque(inicios[desde], fines[hasta - 1], textos[desde:hasta]))
 
     for b in bloques:
         print(f"[{b['inicio']} - {b['fin']}] {b['texto']}")
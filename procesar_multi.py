@@ -1,7 +1,10 @@
 """Orquestador multi-canal para el procesador de videos.
 
 Lee una configuración JSON con la lista de canales y ejecuta el procesamiento
-para cada uno, de forma paralela o secuencial según configuración.
+para cada uno, de forma paralela o secuencial según configuración. Cada canal
+se procesa en un proceso aparte (``parallel`` procesos como máximo), así el
+trabajo en Python de varios canales no compite por el GIL; cada proceso carga
+su propia copia del modelo Vosk.
 
 Ejemplo de configuración::
 
@@ -20,8 +23,12 @@ Si no se entrega ruta, intenta cargar "channels.json" en el directorio actual.
 from __future__ import annotations
 
 import json
+import multiprocessing
 import os
+import signal
 import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from queue import Queue
 from threading import Lock, Thread
 from typing import Any, Dict, List, Tuple
@@ -38,11 +45,15 @@ def cargar_config(ruta: str) -> Dict[str, Any]:
 
 
 def _normalizar_canales(raw: List[Any]) -> List[Tuple[str, bool]]:
-    """Convierte la configuración cruda en tuplas (nombre, send_to_api)."""
-    canales: List[Tuple[str, bool]] = []
+    """Convierte la configuración cruda en tuplas (nombre, send_to_api).
+
+    Un canal repetido se deja una sola vez, en su primera posición, con
+    ``send_to_api`` activo si alguna de sus entradas lo pide.
+    """
+    canales: Dict[str, bool] = {}
     for item in raw:
         if isinstance(item, str):
-            canales.append((item, False))
+            canales[item] = canales.get(item, False)
             continue
         if isinstance(item, dict):
             nombre = item.get("name") or item.get("channel") or item.get("medio")
@@ -51,33 +62,82 @@ def _normalizar_canales(raw: List[Any]) -> List[Tuple[str, bool]]:
             valor = item.get("send_to_api")
             if valor is None:
                 valor = item.get("cuos") or item.get("enviar")
-            canales.append((nombre, bool(valor)))
+            canales[nombre] = canales.get(nombre, False) or bool(valor)
             continue
         raise ValueError("Entrada de canal debe ser string o dict con 'name'")
-    return canales
+    return list(canales.items())
 
 
-def procesar_canal(base: str, canal: str, send_to_api: bool) -> str:
+def _ignorar_sigint() -> None:
+    """Inicializador del pool: Ctrl+C lo atiende solo el proceso principal.
+
+    Así cada hijo termina el canal en curso, como lo hacían los hilos.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def procesar_canal(
+    base: str, canal: str, send_to_api: bool, file_workers: int = 1
+) -> str:
     carpeta = os.path.join(base, canal)
     if not os.path.isdir(carpeta):
         return f"Canal {canal}: carpeta no existe: {carpeta}"
-    pv.main(carpeta, send_to_api=send_to_api)
+    pv.main(carpeta, send_to_api=send_to_api, workers=file_workers)
     return f"Canal {canal}: OK"
 
 
 def procesar_en_cola(
-    base: str, canales_cfg: List[Tuple[str, bool]], parallel: int, loop_minutes: float
+    base: str,
+    canales_cfg: List[Tuple[str, bool]],
+    parallel: int,
+    loop_minutes: float,
+    file_workers: int = 1,
 ) -> None:
     """Ejecuta con cola FIFO estilo worker-pool.
 
     Encola todos los canales en orden y va agregando nuevamente el listado completo
     cada ``loop_minutes``. Si ``loop_minutes`` es 0, procesa solo una vuelta.
+    Los hilos solo reparten la cola; cada canal corre en el pool de procesos.
     """
 
+    def crear_pool() -> ProcessPoolExecutor:
+        # spawn: los hilos del padre no se heredan a medio estado en los hijos
+        return ProcessPoolExecutor(
+            max_workers=parallel,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_ignorar_sigint,
+        )
+
+    pool = crear_pool()
     cola: Queue = Queue()
     lock = Lock()
+    # Un canal a la vez: si una vuelta nueva lo encola mientras sigue en curso,
+    # esa copia se salta en vez de cargar y reescribir el mismo registro (y sin
+    # dejar un worker bloqueado esperando).
+    locks_canal = {canal: Lock() for canal, _ in canales_cfg}
     busy_count = 0
 
+    def ejecutar_canal(canal: str, send: bool) -> str:
+        nonlocal pool
+        with lock:
+            actual = pool
+        try:
+            return actual.submit(
+                procesar_canal, base, canal, send, file_workers
+            ).result()
+        except BrokenProcessPool:
+            # Un hijo murió (OOM, segfault de Kaldi...): el pool ya no sirve.
+            # Se recrea una sola vez y el canal queda para la próxima vuelta.
+            with lock:
+                if pool is actual:
+                    print("Pool de procesos roto; se crea uno nuevo")
+                    actual.shutdown(wait=False, cancel_futures=True)
+                    pool = crear_pool()
+            return (
+                f"Canal {canal}: proceso terminado abruptamente; "
+                "se reintenta en la próxima vuelta"
+            )
+
     def worker() -> None:
         while True:
             item = cola.get()
@@ -93,16 +153,26 @@ def procesar_en_cola(
                 ocupados = busy_count
                 libres = max(0, parallel - ocupados)
             print(f"[ciclo {ciclo}] INICIO {canal} (ocupados={ocupados}, libres={libres})")
+            msg = f"Canal {canal}: interrumpido"
+            lock_canal = locks_canal[canal]
+            tomado = lock_canal.acquire(blocking=False)
             try:
-                msg = procesar_canal(base, canal, send)
+                if tomado:
+                    msg = ejecutar_canal(canal, send)
+                else:
+                    msg = f"Canal {canal}: ya en curso, se salta"
             except Exception as e:  # noqa: BLE001
                 msg = f"Canal {canal}: ERROR: {e}"
-            with lock:
-                busy_count -= 1
-                ocupados = busy_count
-                libres = max(0, parallel - ocupados)
-            print(f"[ciclo {ciclo}] {msg} (ocupados={ocupados}, libres={libres})")
-            cola.task_done()
+            finally:
+                if tomado:
+                    lock_canal.release()
+                # Siempre liberar el item: si no, cola.join() no vuelve nunca
+                with lock:
+                    busy_count -= 1
+                    ocupados = busy_count
+                    libres = max(0, parallel - ocupados)
+                print(f"[ciclo {ciclo}] {msg} (ocupados={ocupados}, libres={libres})")
+                cola.task_done()
 
     threads = [Thread(target=worker, daemon=True) for _ in range(parallel)]
     for t in threads:
@@ -126,6 +196,7 @@ def procesar_en_cola(
             cola.put(None)
         for t in threads:
             t.join()
+        pool.shutdown()
 
 
 def main(config_path: str) -> None:
@@ -134,13 +205,15 @@ def main(config_path: str) -> None:
     canales_cfg = _normalizar_canales(cfg["channels"])
     nombres = [c[0] for c in canales_cfg]
     parallel = int(cfg.get("parallel", min(4, len(canales_cfg))))
-    parallel = max(1, parallel)  # permitir más hilos que canales, quedan en espera
+    parallel = max(1, parallel)  # permitir más workers que canales, quedan en espera
     loop_minutes = float(cfg.get("loop_minutes", 0))
+    # Archivos de un mismo canal en paralelo; cada uno carga su propio modelo
+    file_workers = max(1, int(cfg.get("file_workers", 1)))
 
     print(
         f"Procesando {len(nombres)} canales (parallel={parallel}, loop_minutes={loop_minutes}) desde {base}"
     )
-    procesar_en_cola(base, canales_cfg, parallel, loop_minutes)
+    procesar_en_cola(base, canales_cfg, parallel, loop_minutes, file_workers)
 
 
 if __name__ == "__main__":
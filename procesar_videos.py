@@ -19,17 +19,28 @@ Prioridad de procesamiento (modo "al día"):
 
 from __future__ import annotations
 
+import heapq
 import json
+import multiprocessing
 import os
+import re
 import fcntl
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import itemgetter
 from pathlib import Path
 from time import perf_counter, sleep
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from contextlib import contextmanager
 
+try:
+    import orjson
+except ImportError:  # orjson es opcional; se usa json de la stdlib
+    orjson = None
 
 from generador_audio import (
+    TAMANO_MINIMO_BYTES,
     procesar_audio_con_pausas,
     extraer_hora_desde_nombre,
 )
@@ -38,6 +49,15 @@ import cuos_sender
 # Política de retención: mantener solo las últimas 48 horas por canal
 HOURS_TO_KEEP = 48
 PENDING_WINDOW = 6
+# Forma de ``fecha``/``inicio`` que escribe generador_audio (HH:MM:SS.mmm)
+_FECHA_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+_HORA_MS_RE = re.compile(r"[0-9]{2}:[0-9]{2}:[0-9]{2}\.[0-9]{3}")
+# Hora del nombre de archivo (HH-MM-SS); con la fecha ordena como texto
+_HORA_NOMBRE_RE = re.compile(r"[0-9]{2}-[0-9]{2}-[0-9]{2}")
+_FORMATO_CLAVE = "%Y-%m-%d_%H-%M-%S"
+# Registros ya cargados en este proceso: ruta -> ((st_mtime_ns, st_size), datos).
+# Se reutilizan entre llamadas a ``main`` mientras el archivo no cambie.
+_REGISTRO_CACHE: Dict[str, Tuple[Tuple[int, int], Any]] = {}
 
 
 @contextmanager
@@ -74,6 +94,25 @@ def _parse_datetime(fecha: Optional[str], hora: Optional[str]) -> Optional[datet
 
     if not fecha or not hora:
         return None
+    if isinstance(fecha, str) and isinstance(hora, str):
+        return _parse_datetime_cached(fecha, hora)
+    # Valores que no son texto (registro editado a mano): strptime los rechaza
+    try:
+        return datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H:%M:%S.%f")
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1 << 16)
+def _parse_datetime_cached(fecha: str, hora: str) -> Optional[datetime]:
+    # Cada bloque se consulta tanto para su duración como para la del archivo;
+    # solo recibe textos, así las claves del cache siempre son hashables.
+    if _FECHA_RE.fullmatch(fecha) and _HORA_MS_RE.fullmatch(hora):
+        # Forma que escribe generador_audio: fromisoformat evita strptime
+        try:
+            return datetime.fromisoformat(f"{fecha} {hora}")
+        except ValueError:
+            return None
     try:
         return datetime.strptime(f"{fecha} {hora}", "%Y-%m-%d %H:%M:%S.%f")
     except ValueError:
@@ -98,20 +137,21 @@ def _calcular_duracion_archivo(registros: List[dict]) -> Optional[float]:
 
     if not registros:
         return None
-    inicios: List[datetime] = []
-    fines: List[datetime] = []
+    # Una sola pasada con mínimo/máximo corrientes, sin listas intermedias
+    inicio_min: Optional[datetime] = None
+    fin_max: Optional[datetime] = None
     for bloque in registros:
         if not isinstance(bloque, dict):
             continue
         inicio_dt = _parse_datetime(bloque.get("fecha"), bloque.get("inicio"))
         fin_dt = _parse_datetime(bloque.get("fecha"), bloque.get("fin"))
-        if inicio_dt:
-            inicios.append(inicio_dt)
-        if fin_dt:
-            fines.append(fin_dt)
-    if not inicios or not fines:
+        if inicio_dt and (inicio_min is None or inicio_dt < inicio_min):
+            inicio_min = inicio_dt
+        if fin_dt and (fin_max is None or fin_dt > fin_max):
+            fin_max = fin_dt
+    if inicio_min is None or fin_max is None:
         return None
-    duracion_total = (max(fines) - min(inicios)).total_seconds()
+    duracion_total = (fin_max - inicio_min).total_seconds()
     if duracion_total < 0:
         return None
     return round(duracion_total, 3)
@@ -145,48 +185,124 @@ def _normalizar_entrada(entrada: Any) -> dict:
 
 
 
+def _leer_json(ruta: str) -> Any:
+    """Lee un archivo JSON con orjson si está disponible.
+
+    ``orjson.JSONDecodeError`` hereda de ``json.JSONDecodeError``, por lo que
+    los errores de formato se manejan igual con ambos.
+    """
+
+    if orjson is not None:
+        with open(ruta, "rb") as fh:
+            return orjson.loads(fh.read())
+    with open(ruta, "r", encoding="utf-8") as fh:
+        return json.load(fh)
+
+
 def cargar_registro(ruta: str) -> Dict[str, dict]:
     """Carga el archivo JSON de registro si existe y normaliza su formato."""
 
     if os.path.exists(ruta):
-        with open(ruta, "r", encoding="utf-8") as fh:
-            data = json.load(fh)
+        data = _leer_json(ruta)
         if isinstance(data, dict):
             return {k: _normalizar_entrada(v) for k, v in data.items()}
     return {}
 
 
+def _escribir_json(data: Any, ruta: str) -> None:
+    """Escribe ``data`` como JSON indentado (UTF-8 sin escapar).
+
+    El registro se reescribe completo tras cada archivo: se serializa de una
+    vez (orjson si está disponible) en un temporal que luego reemplaza a
+    ``ruta`` con ``os.replace``. Quien lo lea (api_server, cuos_sender) ve el
+    archivo anterior o el nuevo completo, nunca uno a medio escribir.
+
+    La salida de orjson no es idéntica byte a byte a la de ``json``: algunos
+    flotantes se formatean distinto (``0.00001`` en vez de ``1e-05``) y
+    NaN/Infinity se escriben como ``null``. Para los lectores JSON es
+    equivalente.
+    """
+
+    if orjson is not None:
+        contenido = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    else:
+        contenido = json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+    tmp = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as fh:
+            fh.write(contenido)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp, ruta)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
 def guardar_registro(registro: Dict[str, dict], ruta: str) -> None:
     """Guarda el registro de transcripciones a disco."""
 
-    with open(ruta, "w", encoding="utf-8") as fh:
-        json.dump(registro, fh, ensure_ascii=False, indent=2)
+    _escribir_json(registro, ruta)
 
 
 def cargar_tiempos(ruta: str) -> Dict[str, float]:
     """Carga el registro de tiempos de procesamiento si existe."""
 
     if os.path.exists(ruta):
-        with open(ruta, "r", encoding="utf-8") as fh:
-            return json.load(fh)
+        return _leer_json(ruta)
     return {}
 
 
 def guardar_tiempos(tiempos: Dict[str, float], ruta: str) -> None:
     """Guarda el registro de tiempos de procesamiento."""
 
-    with open(ruta, "w", encoding="utf-8") as fh:
-        json.dump(tiempos, fh, ensure_ascii=False, indent=2)
+    _escribir_json(tiempos, ruta)
+
+
+
+def _firma_archivo(ruta: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(ruta)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _cargar_cacheado(ruta: str, cargar: Callable[[str], Any]) -> Any:
+    """Devuelve los datos de ``ruta`` sin releerla si no cambió desde la última vez.
 
+    Otro proceso puede haber escrito el archivo (mismo canal en otro worker);
+    en ese caso la firma difiere y se vuelve a cargar.
+    """
+
+    clave = os.path.abspath(ruta)
+    firma = _firma_archivo(ruta)
+    previo = _REGISTRO_CACHE.get(clave)
+    if firma is not None and previo is not None and previo[0] == firma:
+        return previo[1]
+    datos = cargar(ruta)
+    if firma is not None:
+        _REGISTRO_CACHE[clave] = (firma, datos)
+    else:
+        _REGISTRO_CACHE.pop(clave, None)
+    return datos
+
+
+def _recordar_guardado(ruta: str, datos: Any) -> None:
+    """Asocia ``datos`` a la firma que dejó la última escritura de ``ruta``."""
+
+    firma = _firma_archivo(ruta)
+    if firma is not None:
+        _REGISTRO_CACHE[os.path.abspath(ruta)] = (firma, datos)
 
 
 def formatear_bloques(bloques: list[dict]) -> str:
     """Convierte la lista de bloques en texto con marcas de tiempo."""
 
-    lineas = []
-    for b in bloques:
-        lineas.append(f"[{b['inicio']} - {b['fin']}] {b['texto']}")
-    return "\n".join(lineas)
+    return "\n".join(f"[{b['inicio']} - {b['fin']}] {b['texto']}" for b in bloques)
 
 
 
@@ -214,6 +330,47 @@ def _esperar_archivo_estable(ruta: str, max_espera: int = 15, paso: int = 3) ->
     return False
 
 
+@lru_cache(maxsize=1 << 14)
+def _clave_hora(ruta: str) -> Optional[str]:
+    """Devuelve ``YYYY-MM-DD_HH-MM-SS`` del nombre, comparable como texto.
+
+    La forma habitual se toma tal cual del nombre sin parsear; otras formas que
+    acepte :func:`extraer_hora_desde_nombre` se normalizan. ``None`` si el
+    nombre no tiene fecha y hora. Memoizada: las claves del registro se
+    revisan en cada corrida.
+    """
+
+    partes = os.path.splitext(os.path.basename(ruta))[0].split("_")
+    if (
+        len(partes) >= 3
+        and _FECHA_RE.fullmatch(partes[1])
+        and _HORA_NOMBRE_RE.fullmatch(partes[2])
+    ):
+        return f"{partes[1]}_{partes[2]}"
+    try:
+        return extraer_hora_desde_nombre(ruta).strftime(_FORMATO_CLAVE)
+    except Exception:
+        return None
+
+
+def _mas_recientes(candidatos: list[tuple[str, str]], cantidad: int) -> Iterator[str]:
+    """Entrega las rutas de ``candidatos`` de la clave más nueva a la más vieja.
+
+    Sin ordenar la carpeta completa: toma las ``cantidad`` primeras con
+    ``heapq.nlargest`` y duplica el tamaño solo si el llamador sigue pidiendo
+    (p.ej. porque algún nombre resultó inválido).
+    """
+
+    entregados = 0
+    while entregados < len(candidatos):
+        # nlargest equivale a sorted(..., reverse=True)[:n], incluso en empates
+        cabeza = heapq.nlargest(cantidad, candidatos, key=itemgetter(1))
+        for ruta, _ in cabeza[entregados:]:
+            yield ruta
+        entregados = len(cabeza)
+        cantidad *= 2
+
+
 def obtener_pendientes(carpeta: str, procesados: Dict[str, dict]) -> list[str]:
     """Devuelve la lista de archivos pendientes (más recientes primero).
 
@@ -224,26 +381,38 @@ def obtener_pendientes(carpeta: str, procesados: Dict[str, dict]) -> list[str]:
     - Devuelve la lista (más antiguos al final) para intentar la siguiente si un lock falla.
     """
 
-    candidatos: list[tuple[str, datetime]] = []
-    for f in os.listdir(carpeta):
-        if not f.lower().endswith((".mp4", ".ogg")):
+    candidatos: list[tuple[str, str]] = []
+    # scandir entrega la ruta y el tipo desde la propia lectura del directorio
+    with os.scandir(carpeta) as it:
+        entradas = [
+            e.path
+            for e in it
+            if e.name.lower().endswith((".mp4", ".ogg")) and e.is_file()
+        ]
+    for ruta in entradas:
+        clave = _clave_hora(ruta)
+        if clave is None:
             continue
-        ruta = os.path.join(carpeta, f)
+        candidatos.append((ruta, clave))
+
+    # Solo se necesita la cabeza de la lista: se valida con
+    # extraer_hora_desde_nombre hasta completar la ventana.
+    validos: list[str] = []
+    start_idx = 0
+    for ruta in _mas_recientes(candidatos, 1 + PENDING_WINDOW):
         try:
-            hora = extraer_hora_desde_nombre(ruta)
+            extraer_hora_desde_nombre(ruta)
         except Exception:
             continue
-        candidatos.append((ruta, hora))
-
-    candidatos.sort(key=lambda x: x[1], reverse=True)
-
-    # Si el más reciente es .ogg, se procesa; de lo contrario, se salta el primero.
-    start_idx = 0
-    if candidatos and not candidatos[0][0].lower().endswith(".ogg"):
-        start_idx = 1
+        if not validos and not ruta.lower().endswith(".ogg"):
+            # Si el más reciente es .ogg, se procesa; de lo contrario, se salta.
+            start_idx = 1
+        validos.append(ruta)
+        if len(validos) >= start_idx + PENDING_WINDOW:
+            break
 
     # Considerar hasta los últimos PENDING_WINDOW elementos a partir del índice calculado
-    top = [ruta for ruta, _ in candidatos[start_idx:start_idx + PENDING_WINDOW]]
+    top = validos[start_idx:start_idx + PENDING_WINDOW]
     pendientes = [ruta for ruta in top if ruta not in procesados]
 
     # Devolver en orden de más seguro/antiguo a más reciente dentro de la ventana
@@ -257,13 +426,14 @@ def limpiar_registros_antiguos(registro: Dict[str, dict],
     Modifica los diccionarios en sitio.
     """
     limite = datetime.now() - timedelta(hours=HOURS_TO_KEEP)
+    limite_str = limite.strftime(_FORMATO_CLAVE)
     keys_a_borrar = []
-    for ruta in list(registro.keys()):
-        try:
-            hora_archivo = extraer_hora_desde_nombre(ruta)
-        except Exception:
+    for ruta in registro:
+        clave = _clave_hora(ruta)
+        if clave is None:
             continue
-        if hora_archivo < limite:
+        # Las claves no tienen fracción de segundo; el límite sí puede tenerla
+        if clave < limite_str or (clave == limite_str and limite.microsecond):
             keys_a_borrar.append(ruta)
 
     for k in keys_a_borrar:
@@ -271,57 +441,165 @@ def limpiar_registros_antiguos(registro: Dict[str, dict],
         tiempos.pop(k, None)
 
 
-def main(carpeta: str, send_to_api: bool = False) -> None:
+def main(carpeta: str, send_to_api: bool = False, workers: int = 1) -> None:
     canal = os.path.basename(os.path.normpath(carpeta))
     registro_archivo = f"transcripciones_{canal}.json"
     tiempos_archivo = f"tiempos_procesamiento_{canal}.json"
-    registro = cargar_registro(registro_archivo)
-    tiempos = cargar_tiempos(tiempos_archivo)
+    registro = _cargar_cacheado(registro_archivo, cargar_registro)
+    tiempos = _cargar_cacheado(tiempos_archivo, cargar_tiempos)
     pendientes = obtener_pendientes(carpeta, registro)
 
-    for archivo in pendientes:
-        with _lock_archivo(archivo) as locked:
-            if not locked:
-                print(f"Saltando {archivo}: otro hilo/proceso ya lo está procesando")
-                continue
-
-            inicio = perf_counter()
-            bloques, duracion_archivo = procesar_audio_con_pausas(archivo)
-            duracion_procesamiento = perf_counter() - inicio
-            registro[archivo] = _normalizar_entrada(
-                {
-                    "duracion": duracion_archivo,
-                    "registros": bloques,
-                }
-            )
-            tiempos[archivo] = duracion_procesamiento
-            # Limpiar entradas antiguas (retención 48h) antes de guardar
+    try:
+        if pendientes:
+            # Limpiar entradas antiguas (retención 48h) una vez por corrida;
+            # se persiste con el primer archivo guardado
             limpiar_registros_antiguos(registro, tiempos)
-            guardar_registro(registro, registro_archivo)
-            guardar_tiempos(tiempos, tiempos_archivo)
-            if send_to_api:
-                try:
-                    enviados = cuos_sender.send_payloads(
-                        Path(registro_archivo),
-                        only_keys=[archivo],
-                    )
-                    print(
-                        f"CUOS: enviados {enviados} payload(s) para {archivo}"
-                    )
-                except Exception as exc:  # noqa: BLE001
-                    print(
-                        f"CUOS: error al enviar payloads para {archivo}: {exc}"
-                    )
+        _procesar_pendientes(
+            pendientes,
+            registro,
+            tiempos,
+            registro_archivo,
+            tiempos_archivo,
+            send_to_api,
+            workers,
+        )
+    except BaseException:
+        # Los dicts pueden tener cambios sin guardar: la próxima vez se releen
+        _REGISTRO_CACHE.pop(os.path.abspath(registro_archivo), None)
+        _REGISTRO_CACHE.pop(os.path.abspath(tiempos_archivo), None)
+        raise
+
+
+def _transcribir_archivo(archivo: str) -> Optional[Tuple[list, float, float]]:
+    """Transcribe ``archivo`` bajo su lock.
+
+    Devuelve ``(bloques, duracion_archivo, duracion_procesamiento)`` o ``None``
+    si otro hilo/proceso ya lo tiene tomado o si el archivo es demasiado chico
+    para tener audio (aún en escritura o truncado): así no queda registrado y
+    se reintenta en la próxima corrida. Es de nivel de módulo para poder
+    ejecutarse en el pool de procesos de :func:`_procesar_pendientes`.
+    """
+
+    if os.path.getsize(archivo) < TAMANO_MINIMO_BYTES:
+        print(f"Saltando {archivo}: archivo vacío o truncado, se reintentará")
+        return None
+
+    with _lock_archivo(archivo) as locked:
+        if not locked:
+            print(f"Saltando {archivo}: otro hilo/proceso ya lo está procesando")
+            return None
+
+        inicio = perf_counter()
+        bloques, duracion_archivo = procesar_audio_con_pausas(archivo)
+        return bloques, duracion_archivo, perf_counter() - inicio
+
+
+def _registrar_resultado(
+    archivo: str,
+    bloques: list,
+    duracion_archivo: float,
+    duracion_procesamiento: float,
+    registro: Dict[str, dict],
+    tiempos: Dict[str, float],
+    registro_archivo: str,
+    tiempos_archivo: str,
+    send_to_api: bool,
+) -> None:
+    registro[archivo] = _normalizar_entrada(
+        {
+            "duracion": duracion_archivo,
+            "registros": bloques,
+        }
+    )
+    tiempos[archivo] = duracion_procesamiento
+    guardar_registro(registro, registro_archivo)
+    guardar_tiempos(tiempos, tiempos_archivo)
+    _recordar_guardado(registro_archivo, registro)
+    _recordar_guardado(tiempos_archivo, tiempos)
+    if send_to_api:
+        try:
+            enviados = cuos_sender.send_payloads(
+                Path(registro_archivo),
+                only_keys=[archivo],
+            )
             print(
-                f"Procesamiento de {archivo} completado en {duracion_procesamiento:.2f} segundos"
+                f"CUOS: enviados {enviados} payload(s) para {archivo}"
             )
+        except Exception as exc:  # noqa: BLE001
+            print(
+                f"CUOS: error al enviar payloads para {archivo}: {exc}"
+            )
+    print(
+        f"Procesamiento de {archivo} completado en {duracion_procesamiento:.2f} segundos"
+    )
+
+
+def _procesar_pendientes(
+    pendientes: List[str],
+    registro: Dict[str, dict],
+    tiempos: Dict[str, float],
+    registro_archivo: str,
+    tiempos_archivo: str,
+    send_to_api: bool,
+    workers: int = 1,
+) -> None:
+    """Transcribe los pendientes y guarda cada resultado apenas está listo.
+
+    Con ``workers > 1`` los archivos se transcriben en paralelo en un pool de
+    procesos (cada uno carga su propio modelo Vosk); el registro se actualiza
+    y se guarda solo en este proceso, en el orden en que van terminando.
+    """
+
+    def registrar(archivo: str, resultado: Optional[Tuple[list, float, float]]) -> None:
+        if resultado is None:
+            return
+        _registrar_resultado(
+            archivo,
+            *resultado,
+            registro,
+            tiempos,
+            registro_archivo,
+            tiempos_archivo,
+            send_to_api,
+        )
+
+    workers = min(workers, len(pendientes))
+    if workers <= 1:
+        for archivo in pendientes:
+            registrar(archivo, _transcribir_archivo(archivo))
+        return
+
+    # Un archivo que falla no descarta lo ya transcrito de los demás: se
+    # registra todo lo que termina y el primer error se relanza al final.
+    primer_error: Optional[Exception] = None
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        futuros = {pool.submit(_transcribir_archivo, a): a for a in pendientes}
+        try:
+            for futuro in as_completed(futuros):
+                archivo = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except Exception as exc:  # noqa: BLE001
+                    print(f"Error al transcribir {archivo}: {exc}")
+                    if primer_error is None:
+                        primer_error = exc
+                    continue
+                registrar(archivo, resultado)
+        except BaseException:
+            # Fallo al guardar o interrupción: no esperar al resto
+            pool.shutdown(cancel_futures=True)
+            raise
+    if primer_error is not None:
+        raise primer_error
 
 
 if __name__ == "__main__":
     import sys
 
-    if len(sys.argv) != 2:
-        print("Uso: python procesar_videos.py <carpeta>")
+    if len(sys.argv) not in (2, 3):
+        print("Uso: python procesar_videos.py <carpeta> [workers]")
         sys.exit(1)
 
-    main(sys.argv[1])
+    main(sys.argv[1], workers=int(sys.argv[2]) if len(sys.argv) == 3 else 1)